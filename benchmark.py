@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+"""Benchmark suite of the INA219 library.
+
+Reports latency percentiles, I2C transactions and allocated memory per
+sample of the public read functions, snapshots, configuration, auto gain
+escalation, the sleep/wake cycle and the polling of many devices, as well as
+the import time of the package in a new interpreter, the bytes allocated
+by the library per read, apart from the driver, and the library overhead per
+read with debug logging enabled and disabled. Runs against the simulated
+driver by default, so it works without hardware.
+
+    python benchmark.py --latency 0.0002 --json results.json
+    python benchmark.py --driver auto --bus 1
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ina219 import I2cDriver, INA219, MeasurementRecord, drivers
+from ina219.devices import INA219Array
+from ina219.instrumentation import InstrumentedDriver, Metrics
+
+
+SHUNT_OHMS = 0.1
+MAX_EXPECTED_AMPS = 0.4
+
+# import statements timed in a new interpreter each
+IMPORTS = [
+    ('import_package', 'import ina219'),
+    ('import_convert', 'import ina219.convert'),
+    ('import_ina219', 'from ina219 import INA219'),
+    ('import_drivers', 'from ina219 import INA219, drivers'),
+]
+
+DRIVERS = {
+    'auto': drivers.auto,
+    'i2c-dev': drivers.I2cDevDriver.load,
+    'smbus': drivers.SmbusDriver.load,
+    'smbus2': drivers.Smbus2Driver.load,
+    'adafruit': drivers.AdafruitDriver.load,
+}
+
+
+class FixedRegisterDriver(I2cDriver):
+    """Driver of a device with fixed register values, allocating nothing.
+
+    Isolates the allocations of the library from those of the driver.
+    """
+
+    # bus voltage 4.808V, shunt voltage 20mV, indexed by register address
+    REGISTERS = [0x399f, 0x07d0, 0x2592, 0x1ea9, 0x0001, 0x8333]
+
+    @classmethod
+    def load(cls, interface):
+        return cls()
+
+    def write(self, address, register, data):
+        pass
+
+    def read_word(self, address, register, signed=False):
+        return self.REGISTERS[register]
+
+    def read_words_into(self, address, registers, values):
+        registers_values = self.REGISTERS
+        index = 0
+        count = len(registers)
+        while index < count:
+            values[index] = registers_values[registers[index]]
+            index += 1
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(name, func, driver, iterations, samples=1):
+    """Time `iterations` calls of func, each taking `samples` samples."""
+    for _ in range(min(10, iterations)):
+        func()
+
+    clock = time.perf_counter_ns
+    latencies = []
+    transactions = driver.metrics.transactions
+    for _ in range(iterations):
+        start = clock()
+        func()
+        latencies.append(clock() - start)
+    transactions = driver.metrics.transactions - transactions
+    latencies.sort()
+
+    peaks = []
+    for _ in range(min(100, iterations)):
+        tracemalloc.start()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    peaks.sort()
+
+    return {
+        'name': name,
+        'iterations': iterations,
+        'p50_us': percentile(latencies, 0.5) / samples / 1000,
+        'p99_us': percentile(latencies, 0.99) / samples / 1000,
+        'transactions_per_sample': transactions / iterations / samples,
+        'alloc_bytes_per_sample': percentile(peaks, 0.5) / samples,
+    }
+
+
+def allocations(iterations):
+    """Measure the bytes allocated per call of the library read paths."""
+    ina = INA219(SHUNT_OHMS, MAX_EXPECTED_AMPS,
+                 i2c_driver=FixedRegisterDriver())
+    ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+    record = MeasurementRecord()
+    words = [0] * 4
+    for name, func in [('current', ina.current),
+                       ('read_all', ina.read_all),
+                       ('read_into', lambda: ina.read_into(record)),
+                       ('sampler_read', lambda: ina._read_raw(words))]:
+        for _ in range(10):
+            func()
+        peaks = []
+        for _ in range(iterations):
+            tracemalloc.start()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        peaks.sort()
+        yield {
+            'name': name,
+            'p50_bytes': percentile(peaks, 0.5),
+            'max_bytes': peaks[-1],
+        }
+
+
+def logging_overhead(iterations):
+    """Time voltage() with the library logger at DEBUG and at WARNING."""
+    ina = INA219(SHUNT_OHMS, MAX_EXPECTED_AMPS,
+                 i2c_driver=FixedRegisterDriver())
+    ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+    logger = ina.logger
+    level, propagate = logger.level, logger.propagate
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+    logger.propagate = False
+    clock = time.perf_counter_ns
+    try:
+        for name, log_level in [('voltage_debug', logging.DEBUG),
+                                ('voltage_warning', logging.WARNING)]:
+            logger.setLevel(log_level)
+            for _ in range(10):
+                ina.voltage()
+            latencies = []
+            for _ in range(iterations):
+                start = clock()
+                ina.voltage()
+                latencies.append(clock() - start)
+            latencies.sort()
+            yield {
+                'name': name,
+                'iterations': iterations,
+                'p50_us': percentile(latencies, 0.5) / 1000,
+                'p99_us': percentile(latencies, 0.99) / 1000,
+            }
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = propagate
+
+
+def startup(name, statement, runs):
+    """Time `runs` interpreter startups running statement, less a bare one."""
+    def interpreter(code):
+        latencies = []
+        for _ in range(runs):
+            start = time.perf_counter_ns()
+            subprocess.run([sys.executable, '-c', code], check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+            latencies.append(time.perf_counter_ns() - start)
+        latencies.sort()
+        return latencies
+
+    bare = percentile(interpreter('pass'), 0.5)
+    latencies = interpreter(statement)
+    return {
+        'name': name,
+        'iterations': runs,
+        'p50_us': (percentile(latencies, 0.5) - bare) / 1000,
+        'p99_us': (percentile(latencies, 0.99) - bare) / 1000,
+        'transactions_per_sample': 0.0,
+        'alloc_bytes_per_sample': 0,
+    }
+
+
+def benchmarks(args, driver):
+    ina = INA219(SHUNT_OHMS, MAX_EXPECTED_AMPS, i2c_driver=driver)
+    ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+
+    def auto_gain():
+        driver.driver.set_load(5.0, 0.1)
+        ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+        driver.driver.set_load(5.0, 1.0)
+        time.sleep(ina.conversion_time())
+        ina.current()
+
+    def sleep_wake():
+        ina.sleep()
+        ina.wake()
+
+    yield 'voltage', ina.voltage, 1
+    yield 'current', ina.current, 1
+    yield 'power', ina.power, 1
+    yield 'shunt_voltage', ina.shunt_voltage, 1
+    yield 'supply_voltage', ina.supply_voltage, 1
+    yield 'read_all', ina.read_all, 1
+    record = MeasurementRecord()
+    yield 'read_into', lambda: ina.read_into(record), 1
+    yield 'configure', lambda: ina.configure(ina.RANGE_16V, ina.GAIN_AUTO), 1
+    if args.driver == 'simulated':
+        yield 'auto_gain', auto_gain, 1
+    yield 'sleep_wake', sleep_wake, 1
+
+    array = INA219Array(driver_factory=lambda interface: driver)
+    for address in args.addresses:
+        array.add(SHUNT_OHMS, MAX_EXPECTED_AMPS, address=address,
+                  interface=args.bus)
+    array.configure(INA219.RANGE_16V, INA219.GAIN_AUTO)
+    yield ('multi_device_%d' % len(args.addresses),
+           lambda: array.read_all(wait=False), len(args.addresses))
+
+
+def print_result(result):
+    print('%-20s %10.2f %10.2f %8.2f %10d' % (
+        result['name'], result['p50_us'], result['p99_us'],
+        result['transactions_per_sample'], result['alloc_bytes_per_sample']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--driver', default='simulated',
+                        choices=['simulated'] + sorted(DRIVERS))
+    parser.add_argument('--bus', type=int, default=INA219.BUSNUM_DEFAULT)
+    parser.add_argument('--addresses', type=lambda a: int(a, 0), nargs='+',
+                        help='device addresses for the multi device '
+                             'benchmark (default: 0x40-0x4F simulated, '
+                             '0x40 otherwise)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated bus transaction latency in seconds')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--startup-runs', type=int, default=20,
+                        help='interpreter startups per import time '
+                             'benchmark, 0 to skip them')
+    parser.add_argument('--metrics', action='store_true',
+                        help='print the bus transactions per register')
+    parser.add_argument('--json', metavar='PATH',
+                        help='write the results to a JSON file')
+    args = parser.parse_args(argv)
+
+    if args.driver == 'simulated':
+        if args.addresses is None:
+            args.addresses = list(range(0x40, 0x50))
+        driver = InstrumentedDriver(drivers.SimulatedINA219Driver(
+            addresses=args.addresses, latency=args.latency), Metrics())
+    else:
+        if args.addresses is None:
+            args.addresses = [INA219.I2C_ADDR_DEFAULT]
+        driver = InstrumentedDriver(DRIVERS[args.driver](args.bus),
+                                    Metrics())
+
+    results = []
+    print('%-20s %10s %10s %8s %10s' %
+          ('benchmark', 'p50 us', 'p99 us', 'xfers', 'alloc B'))
+    for name, func, samples in benchmarks(args, driver):
+        results.append(run(name, func, driver, args.iterations, samples))
+        print_result(results[-1])
+    if args.startup_runs > 0:
+        for name, statement in IMPORTS:
+            results.append(startup(name, statement, args.startup_runs))
+            print_result(results[-1])
+
+    print()
+    print('%-20s %10s %10s' % ('allocations', 'p50 B', 'max B'))
+    allocated = list(allocations(min(100, args.iterations)))
+    for result in allocated:
+        print('%-20s %10d %10d' % (
+            result['name'], result['p50_bytes'], result['max_bytes']))
+
+    print()
+    print('%-20s %10s %10s' % ('logging', 'p50 us', 'p99 us'))
+    logged = list(logging_overhead(args.iterations))
+    for result in logged:
+        print('%-20s %10.2f %10.2f' % (
+            result['name'], result['p50_us'], result['p99_us']))
+    if not __debug__:
+        print('(register logging removed by python -O)')
+
+    if args.metrics:
+        print()
+        print(driver.metrics.report())
+
+    if args.json:
+        report = {
+            'driver': args.driver,
+            'latency': args.latency,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'time': time.time(),
+            'results': results,
+            'allocations': allocated,
+            'logging': logged,
+            'optimized': not __debug__,
+        }
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,7 @@ def read():
 
     # new interface passing explicit I2C driver
     driver = drivers.auto(interface=1)
+    # driver = drivers.I2cDevDriver.load(interface=1)
     # driver = drivers.SmbusDriver.load(interface=1)
     # driver = drivers.Smbus2Driver.load(interface=1)
     # driver = drivers.AdafruitDriver.load(interface=1)
@@ -1 +1,41 @@
-from .ina219 import INA219, I2cDriver, DeviceRangeError  # noqa: F401
+"""Library for the INA219 current and power monitor from Texas Instruments.
+
+The names of the package and its submodules are imported on first use, so
+that e.g. processing capture files with ina219.convert does not import the
+device and driver code.
+"""
+import importlib
+import sys
+
+TYPE_CHECKING = False  # the typing module alone takes longer to import
+if TYPE_CHECKING:
+    from typing import Any, List
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    # module __getattr__ requires Python 3.7
+    from .ina219 import INA219, I2cDriver, DeviceRangeError  # noqa: F401
+    from .ina219 import bus_lock  # noqa: F401
+    from .ina219 import AdcPlan, Calibration, Measurement  # noqa: F401
+    from .ina219 import MeasurementRecord  # noqa: F401
+
+__all__ = ['INA219', 'I2cDriver', 'DeviceRangeError', 'bus_lock', 'AdcPlan',
+           'Calibration', 'Measurement', 'MeasurementRecord']
+
+_SUBMODULES = ('aio', 'capture', 'cli', 'convert', 'devices', 'drivers',
+               'ina219', 'instrumentation', 'sampling', 'stats')
+
+
+def __getattr__(name: str) -> 'Any':
+    if name in __all__:
+        value = getattr(importlib.import_module('.ina219', __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> 'List[str]':
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -0,0 +1,160 @@
+"""asyncio interface to the INA219, for sampling without blocking."""
+import asyncio
+import atexit
+from concurrent.futures import Executor, ThreadPoolExecutor
+import functools
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
+import weakref
+
+from .ina219 import bus_lock, INA219, I2cDriver, Measurement
+
+T = TypeVar('T')
+
+# executors keyed by bus lock, which all drivers of a bus share
+_executors: 'weakref.WeakKeyDictionary[Any, ThreadPoolExecutor]' = \
+    weakref.WeakKeyDictionary()
+_executors_lock = threading.Lock()
+
+
+def bus_executor(driver: I2cDriver) -> Executor:
+    """Return the single threaded executor of the bus of an I2C driver.
+
+    All I2C transactions of a bus run in its own thread, in order, while
+    different buses run concurrently. Drivers sharing a bus lock, e.g. those
+    loaded for the same interface or instrumenting another driver, share
+    the executor, see ina219.bus_lock().
+
+    Arguments:
+    driver -- the I2C driver of the bus
+    """
+    lock = bus_lock(driver)
+    with _executors_lock:
+        executor = _executors.get(lock)
+        if executor is None:
+            executor = _executors[lock] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='ina219-bus')
+        return executor
+
+
+@atexit.register
+def _shutdown_executors() -> None:
+    with _executors_lock:
+        executors = list(_executors.values())
+    for executor in executors:
+        executor.shutdown()
+
+
+class AsyncINA219:
+    """Coroutine versions of the INA219 functionality."""
+
+    def __init__(self, ina: INA219,
+                 executor: Optional[Executor] = None) -> None:
+        """Construct the class.
+
+        Arguments:
+        ina -- the INA219 instance to wrap.
+        executor -- the executor running the I2C transactions, defaults to
+            the executor shared by all devices of the same I2C driver.
+        """
+        self.ina = ina
+        self._executor = executor or bus_executor(ina._i2c)
+
+    async def _run(self, func: Callable[..., T], *args: Any,
+                   **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs))
+
+    async def configure(self, *args: Any, **kwargs: Any) -> None:
+        """Configure and calibrate the INA219, see INA219.configure()."""
+        await self._run(self.ina.configure, *args, **kwargs)
+
+    async def voltage(self) -> float:
+        """Return the bus voltage in volts."""
+        return await self._run(self.ina.voltage)
+
+    async def supply_voltage(self) -> float:
+        """Return the bus supply voltage in volts."""
+        return await self._run(self.ina.supply_voltage)
+
+    async def current(self) -> float:
+        """Return the bus current in milliamps."""
+        return await self._run(self.ina.current)
+
+    async def power(self) -> float:
+        """Return the bus power consumption in milliwatts."""
+        return await self._run(self.ina.power)
+
+    async def shunt_voltage(self) -> float:
+        """Return the shunt voltage in millivolts."""
+        return await self._run(self.ina.shunt_voltage)
+
+    async def read_all(self) -> Measurement:
+        """Return a snapshot of all measurements, see INA219.read_all()."""
+        return await self._run(self.ina.read_all)
+
+    async def current_overflow(self) -> bool:
+        """Return true if the sensor has detect current overflow."""
+        return await self._run(self.ina.current_overflow)
+
+    async def is_conversion_ready(self) -> bool:
+        """Check if conversion of a new reading has occured."""
+        return await self._run(self.ina.is_conversion_ready)
+
+    async def sleep(self) -> None:
+        """Put the INA219 into power down mode."""
+        await self._run(self.ina.sleep)
+
+    async def wake(self) -> None:
+        """Wake the INA219 from power down mode."""
+        await self._run(self.ina._power_up)
+        await asyncio.sleep(INA219.WAKE_DELAY)
+
+    async def reset(self) -> None:
+        """Reset the INA219 to its default configuration."""
+        await self._run(self.ina.reset)
+
+    async def stream(self, interval: Optional[float] = None,
+                     timeout: Optional[float] = None
+                     ) -> AsyncIterator[Measurement]:
+        """Yield measurements, forever.
+
+        Without an interval every new conversion is yielded exactly once,
+        sleeping most of the conversion time and then polling the conversion
+        ready flag. A TimeoutError exception is thrown if no conversion
+        completes in time, e.g. as the device is powered down. Otherwise a
+        snapshot is taken every interval seconds.
+
+        Arguments:
+        interval -- the time in seconds between two measurements (optional).
+        timeout -- the time in seconds to wait for a conversion, defaults to
+            INA219.conversion_timeout().
+        """
+        loop = asyncio.get_running_loop()
+        if interval is not None:
+            deadline = loop.time()
+            while True:
+                yield await self.read_all()
+                deadline += interval
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+        period = self.ina.conversion_time()
+        if timeout is None:
+            timeout = self.ina.conversion_timeout()
+        deadline = time.monotonic() + timeout
+        while True:
+            measurement = await self._run(self._poll_measurement)
+            if measurement is None:
+                if time.monotonic() >= deadline:
+                    raise self.ina._conversion_timeout_error(timeout)
+                await asyncio.sleep(self.ina.poll_interval())
+                continue
+            yield measurement
+            await asyncio.sleep(max(
+                0.0, measurement.timestamp + period * 0.9 - time.monotonic()))
+            deadline = time.monotonic() + timeout
+
+    def _poll_measurement(self) -> Optional[Measurement]:
+        return self.ina._poll_measurement(time.monotonic())
@@ -0,0 +1,183 @@
+"""Compact binary capture files of raw INA219 samples.
+
+A capture file starts with a fixed size header holding the configuration and
+calibration of the device, followed by fixed width little endian records of
+a timestamp and the bus voltage, shunt voltage, current and power register
+words. Files are written incrementally and read memory mapped, so captures
+larger than memory can be analysed.
+"""
+import mmap
+import struct
+import sys
+import time
+from typing import Any, BinaryIO, Optional, Sequence, TYPE_CHECKING, Union
+
+from . import convert
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .ina219 import INA219
+
+MAGIC = b'INA219CP'
+VERSION = 1
+
+# magic, version, header size, calibration, voltage range, gain, bus ADC,
+# shunt ADC, mode, current LSB, power LSB, shunt ohms, wall clock time and
+# monotonic time of the start of the capture, padded to 64 bytes.
+HEADER = struct.Struct('<8sHHHBBBBB3xddddd')
+HEADER_SIZE = 64
+RECORD = struct.Struct('<dHHHH')  # timestamp, bus, shunt, current, power
+
+_NUMPY_RECORD = [('timestamp', '<f8'), ('bus', '<u2'), ('shunt', '<u2'),
+                 ('current', '<u2'), ('power', '<u2')]
+
+
+class CaptureWriter:
+    """Write raw samples of an INA219 to a capture file."""
+
+    def __init__(self, file: Union[str, BinaryIO], ina: 'INA219') -> None:
+        """Construct the class and write the header.
+
+        Arguments:
+        file -- path or binary file object to write to.
+        ina -- the configured INA219 instance the samples are taken from.
+        """
+        if isinstance(file, str):
+            self._file: BinaryIO = open(file, 'wb')
+            self._owned = True
+        else:
+            self._file = file
+            self._owned = False
+        header = HEADER.pack(
+            MAGIC, VERSION, HEADER_SIZE, ina.calibration, ina._voltage_range,
+            ina._gain, ina._bus_adc, ina._shunt_adc, ina._mode,
+            ina.current_lsb, ina.power_lsb, ina._shunt_ohms,
+            time.time(), time.monotonic())
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+        self.records = 0
+
+    def __enter__(self) -> 'CaptureWriter':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def write(self, timestamp: float, words: Sequence[int]) -> None:
+        """Write a single sample.
+
+        Arguments:
+        timestamp -- the time.monotonic() time of the sample.
+        words -- the bus voltage, shunt voltage, current and power register
+            words.
+        """
+        self._file.write(RECORD.pack(timestamp, *words))
+        self.records += 1
+
+    def write_many(self, timestamps: Sequence[float],
+                   words: Sequence[int]) -> None:
+        """Write samples in bulk, e.g. as drained from a RingBuffer.
+
+        Arguments:
+        timestamps -- the time.monotonic() times of the samples.
+        words -- the register words, RingBuffer.WORDS per sample.
+        """
+        count = len(timestamps)
+        data = bytearray(count * RECORD.size)
+        pack_into = RECORD.pack_into
+        for i in range(count):
+            base = i * 4
+            pack_into(data, i * RECORD.size, timestamps[i], words[base],
+                      words[base + 1], words[base + 2], words[base + 3])
+        self._file.write(data)
+        self.records += count
+
+    def flush(self) -> None:
+        """Flush written samples to the file."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the file, if opened by the writer."""
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class CaptureReader:
+    """Memory mapped, zero copy access to a capture file.
+
+    The column attributes are views into the mapped file: NumPy arrays when
+    NumPy is installed, otherwise memoryviews. They must be released before
+    the reader is closed.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Construct the class and map the file.
+
+        Arguments:
+        path -- path of the capture file.
+        """
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, header_size, self.calibration, self.voltage_range,
+         self.gain, self.bus_adc, self.shunt_adc, self.mode,
+         self.current_lsb, self.power_lsb, self.shunt_ohms, self.start_time,
+         self.start_monotonic) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError('%s is not a version %d INA219 capture file' %
+                             (path, VERSION))
+        self.records = int(len(self._mmap) - header_size) // RECORD.size
+        end = header_size + self.records * RECORD.size
+
+        numpy = convert._numpy()
+        if numpy is not None:
+            self._view: Any = None
+            columns = numpy.frombuffer(
+                self._mmap, dtype=_NUMPY_RECORD, count=self.records,
+                offset=header_size)
+            self.timestamp = columns['timestamp']
+            self.bus = columns['bus']
+            self.shunt = columns['shunt']
+            self.current = columns['current']
+            self.power = columns['power']
+        else:
+            if sys.byteorder != 'little':
+                raise NotImplementedError(
+                    'Reading captures on big endian systems requires NumPy')
+            self._view = memoryview(self._mmap)[header_size:end]
+            words = self._view.cast('H')
+            self.timestamp = self._view.cast('d')[0::2]
+            self.bus = words[4::8]
+            self.shunt = words[5::8]
+            self.current = words[6::8]
+            self.power = words[7::8]
+
+    def __len__(self) -> int:
+        return self.records
+
+    def __enter__(self) -> 'CaptureReader':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def converted(self, start: int = 0,
+                  stop: Optional[int] = None) -> convert.Converted:
+        """Return a range of samples converted to engineering units.
+
+        Arguments:
+        start -- index of the first sample.
+        stop -- index after the last sample, defaults to the end.
+        """
+        return convert.convert_columns(
+            self.bus[start:stop], self.shunt[start:stop],
+            self.current[start:stop], self.power[start:stop],
+            self.current_lsb, self.power_lsb)
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self.timestamp = self.bus = self.shunt = None
+        self.current = self.power = None
+        if self._view is not None:
+            self._view.release()
+        self._mmap.close()
@@ -0,0 +1,357 @@
+"""Command line sampler and logger of INA219 devices.
+
+Configures one or more devices, samples them in background threads either at
+a fixed rate or paced by their conversion ready flags, and streams the
+samples to stdout as CSV or JSON lines, or into binary capture files. The
+achieved sample rate and the number of samples dropped, as the sampling fell
+behind or the output could not keep up, are reported on stderr.
+
+    ina219 --shunt-ohms 0.1 --address 0x40 0x41 --rate 1000 --duration 10
+    ina219 --address 1:0x40 4:0x40 --format binary --output trace.bin
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+from typing import (Any, Callable, Dict, IO, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+from . import capture, convert, drivers
+from .devices import INA219Array
+from .ina219 import bus_lock, I2cDriver, INA219
+from .sampling import MultiBusSampler
+
+DRIVERS: Dict[str, Callable[[int], I2cDriver]] = {
+    'auto': drivers.auto,
+    'i2c-dev': drivers.I2cDevDriver.load,
+    'smbus': drivers.SmbusDriver.load,
+    'smbus2': drivers.Smbus2Driver.load,
+    'adafruit': drivers.AdafruitDriver.load,
+}
+
+RANGES = {'16': INA219.RANGE_16V, '32': INA219.RANGE_32V}
+
+# e.g. '40mv': GAIN_1_40MV and 'auto': GAIN_AUTO
+GAINS = {name.split('_')[-1].lower(): value
+         for name, value in vars(INA219).items() if name.startswith('GAIN_')}
+
+# e.g. '12bit': ADC_12BIT and '128samp': ADC_128SAMP
+ADCS = {name[4:].lower(): value
+        for name, value in vars(INA219).items() if name.startswith('ADC_')}
+
+FORMATS = ('csv', 'jsonl', 'binary')
+
+FIELDS = ('time', 'bus', 'address', 'voltage', 'shunt_voltage', 'current',
+          'power', 'overflow')
+
+# Samples of a device drained at once: timestamps and register words.
+Block = Tuple[Sequence[float], Sequence[int]]
+
+# A device given on the command line: bus number (None for --bus) and address.
+Device = Tuple[Optional[int], int]
+
+
+class TextOutput:
+    """Converted samples of all devices as CSV or JSON lines, oldest first.
+
+    Times are seconds since the start of sampling, voltages in volts,
+    shunt voltages in millivolts, currents in milliamps and powers in
+    milliwatts. Current and power are invalid if overflow is set.
+    """
+
+    def __init__(self, file: IO[str], jsonl: bool,
+                 devices: Sequence[Tuple[int, int]],
+                 array: INA219Array, start: float) -> None:
+        """Construct the class and write the CSV header.
+
+        Arguments:
+        file -- the text file to write to.
+        jsonl -- write JSON lines rather than CSV.
+        devices -- the bus number and address of each device.
+        array -- the INA219 instances of the devices.
+        start -- the time.monotonic() time sampling started at.
+        """
+        self._file = file
+        self._jsonl = jsonl
+        self._devices = [(bus, '0x%02x' % address)
+                         for bus, address in devices]
+        self._lsbs = [(ina.current_lsb, ina.power_lsb)
+                      for ina in array.devices]
+        self._start = start
+        if not jsonl:
+            file.write(','.join(FIELDS) + '\n')
+
+    def write(self, blocks: Sequence[Block]) -> None:
+        """Write a block of samples per device, merged in time order.
+
+        Arguments:
+        blocks -- the timestamps and register words of each device.
+        """
+        rows = heapq.merge(*(self.__rows(index, *block)
+                             for index, block in enumerate(blocks)))
+        write = self._file.write
+        if self._jsonl:
+            for row in rows:
+                write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+        else:
+            for row in rows:
+                write('%.6f,%d,%s,%.3f,%.2f,%.4f,%.4f,%d\n' % row)
+
+    def __rows(self, index: int, timestamps: Sequence[float],
+               words: Sequence[int]) -> Iterator[Tuple[Any, ...]]:
+        if not len(timestamps):
+            return
+        bus, address = self._devices[index]
+        converted = convert.convert(words, *self._lsbs[index])
+        start = self._start
+        for sample, timestamp in enumerate(timestamps):
+            yield (round(timestamp - start, 6), bus, address,
+                   round(float(converted.voltage[sample]), 3),
+                   round(float(converted.shunt_voltage[sample]), 2),
+                   round(float(converted.current[sample]), 4),
+                   round(float(converted.power[sample]), 4),
+                   bool(converted.overflow[sample]))
+
+    def flush(self) -> None:
+        """Flush written samples."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush written samples, the file is left open."""
+        self._file.flush()
+
+
+class BinaryOutput:
+    """Raw samples in a capture file per device, see ina219.capture."""
+
+    def __init__(self, path: str, devices: Sequence[Tuple[int, int]],
+                 array: INA219Array) -> None:
+        """Construct the class and create the capture files.
+
+        Arguments:
+        path -- the capture file, with several devices the bus number and
+            address of each device are appended to its base name, e.g.
+            trace-1-0x40.bin.
+        devices -- the bus number and address of each device.
+        array -- the INA219 instances of the devices.
+        """
+        if len(devices) == 1:
+            paths = [path]
+        else:
+            base, extension = os.path.splitext(path)
+            paths = ['%s-%d-0x%02x%s' % (base, bus, address, extension)
+                     for bus, address in devices]
+        self.paths = paths
+        self._writers: List[capture.CaptureWriter] = []
+        try:
+            for path, ina in zip(paths, array.devices):
+                self._writers.append(capture.CaptureWriter(path, ina))
+        except BaseException:
+            self.close()
+            raise
+
+    def write(self, blocks: Sequence[Block]) -> None:
+        """Write a block of samples per device.
+
+        Arguments:
+        blocks -- the timestamps and register words of each device.
+        """
+        for writer, (timestamps, words) in zip(self._writers, blocks):
+            writer.write_many(timestamps, words)
+
+    def flush(self) -> None:
+        """Flush written samples to the files."""
+        for writer in self._writers:
+            writer.flush()
+
+    def close(self) -> None:
+        """Close the files."""
+        for writer in self._writers:
+            writer.close()
+
+
+def _device(spec: str) -> Device:
+    bus, _, address = spec.rpartition(':')
+    try:
+        return (int(bus) if bus else None, int(address, 0))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'invalid device %r, expected ADDRESS or BUS:ADDRESS' % spec)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='ina219', description=__doc__.splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    devices = parser.add_argument_group('devices')
+    devices.add_argument('--address', '-a', type=_device, nargs='+',
+                         default=[(None, INA219.I2C_ADDR_DEFAULT)],
+                         metavar='[BUS:]ADDRESS',
+                         help='device addresses, on --bus unless given')
+    devices.add_argument('--bus', '-b', type=int,
+                         default=INA219.BUSNUM_DEFAULT,
+                         help='I2C bus number of the devices')
+    devices.add_argument('--driver', default='auto',
+                         choices=sorted(DRIVERS) + ['simulated'],
+                         help='I2C driver, simulated needs no hardware')
+    devices.add_argument('--shunt-ohms', type=float, default=0.1,
+                         help='value of the shunt resistors in ohms')
+    devices.add_argument('--max-amps', type=float,
+                         help='the maximum expected current in amps')
+    devices.add_argument('--range', default='32', choices=RANGES,
+                         help='full scale bus voltage range in volts')
+    devices.add_argument('--gain', default='auto', choices=GAINS,
+                         help='maximum shunt voltage, auto selects it once '
+                              'when configuring')
+    devices.add_argument('--bus-adc', default='12bit', choices=ADCS,
+                         help='bus ADC resolution or samples averaged')
+    devices.add_argument('--shunt-adc', default='12bit', choices=ADCS,
+                         help='shunt ADC resolution or samples averaged')
+    sampling = parser.add_argument_group('sampling')
+    sampling.add_argument('--rate', '-r', type=float,
+                          help='samples per second of each device, '
+                               'defaults to every new conversion')
+    sampling.add_argument('--duration', '-d', type=float,
+                          help='seconds to sample, until interrupted if '
+                               'not given')
+    sampling.add_argument('--count', '-n', type=int,
+                          help='samples to take of each device')
+    sampling.add_argument('--capacity', type=int, default=65536,
+                          help='samples buffered per device')
+    sampling.add_argument('--interval', type=float, default=0.1,
+                          help='seconds between two writes of the '
+                               'buffered samples')
+    output = parser.add_argument_group('output')
+    output.add_argument('--format', '-f', default='csv', choices=FORMATS)
+    output.add_argument('--output', '-o', metavar='PATH',
+                        help='file to write to, defaults to stdout; binary '
+                             'captures need a file per device')
+    output.add_argument('--quiet', '-q', action='store_true',
+                        help='do not report the achieved rate')
+    return parser
+
+
+def _driver_factory(name: str,
+                    devices: Sequence[Tuple[int, int]]) \
+        -> Callable[[int], I2cDriver]:
+    if name != 'simulated':
+        return DRIVERS[name]
+
+    def simulated(interface: int) -> I2cDriver:
+        driver = drivers.SimulatedINA219Driver(
+            addresses=[a for bus, a in devices if bus == interface])
+        bus_lock(driver, interface)
+        return driver
+    return simulated
+
+
+def _drain(sampler: MultiBusSampler, output: Any, written: List[int],
+           spans: List[List[float]], count: Optional[int]) -> bool:
+    """Write the buffered samples, true once count samples were written."""
+    blocks = []
+    for index, buffer in enumerate(sampler.buffers):
+        timestamps, words = buffer.drain()
+        if count is not None:
+            samples = max(0, min(len(timestamps), count - written[index]))
+            timestamps = timestamps[:samples]
+            words = words[:samples * convert.WORDS]
+        if len(timestamps):
+            if not written[index]:
+                spans[index][0] = timestamps[0]
+            spans[index][1] = timestamps[-1]
+        written[index] += len(timestamps)
+        blocks.append((timestamps, words))
+    output.write(blocks)
+    output.flush()
+    return count is not None and min(written) >= count
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the sampler, return the exit status.
+
+    Arguments:
+    argv -- the command line arguments, defaults to sys.argv[1:].
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.format == 'binary' and args.output is None:
+        parser.error('the binary format needs --output')
+    devices = [(args.bus if bus is None else bus, address)
+               for bus, address in args.address]
+    if len(set(devices)) != len(devices):
+        parser.error('devices given more than once')
+
+    array = INA219Array(driver_factory=_driver_factory(args.driver, devices))
+    try:
+        for bus, address in devices:
+            array.add(args.shunt_ohms, args.max_amps, address=address,
+                      interface=bus)
+        array.configure(RANGES[args.range], GAINS[args.gain],
+                        ADCS[args.bus_adc], ADCS[args.shunt_adc])
+    except (OSError, ValueError) as e:
+        parser.exit(1, '%s: error: %s\n' % (parser.prog, e))
+
+    sampler = MultiBusSampler(array.devices, rate=args.rate,
+                              capacity=args.capacity)
+    written = [0] * len(devices)
+    spans = [[0.0, 0.0] for _ in devices]  # first and last sample time
+    file: Optional[IO[str]] = None
+    start = time.monotonic()
+    if args.format == 'binary':
+        output: Any = BinaryOutput(args.output, devices, array)
+    else:
+        if args.output is None:
+            file = sys.stdout
+        else:
+            file = open(args.output, 'w')
+        output = TextOutput(file, args.format == 'jsonl', devices, array,
+                            start)
+    try:
+        sampler.start()
+        try:
+            done = False
+            while not done and sampler.error is None:
+                time.sleep(args.interval)
+                done = _drain(
+                    sampler, output, written, spans, args.count) or (
+                    args.duration is not None and
+                    time.monotonic() - start >= args.duration)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sampler.stop()
+            elapsed = time.monotonic() - start
+        _drain(sampler, output, written, spans, args.count)
+    finally:
+        output.close()
+        if file is not None and file is not sys.stdout:
+            file.close()
+
+    if not args.quiet:
+        # the rate achieved between the first and the last sample
+        rates = [(samples - 1) / (last - first)
+                 for samples, (first, last) in zip(written, spans)
+                 if last > first]
+        sys.stderr.write(
+            '%d samples of %d devices in %.3fs, %.1f samples/s per device, '
+            '%d dropped (%d periods skipped, %d conversions missed, %d '
+            'overwritten)\n' % (
+                sum(written), len(devices), elapsed,
+                sum(rates) / len(rates) if rates else 0.0, sampler.lost,
+                sum(sampler.skipped), sum(sampler.missed), sampler.dropped))
+        if len(devices) > 1:
+            for index, (bus, address) in enumerate(devices):
+                sys.stderr.write('  %d:0x%02x %d samples, %d dropped\n' % (
+                    bus, address, written[index],
+                    sampler.skipped[index] + sampler.missed[index] +
+                    sampler.buffers[index].dropped))
+    if sampler.error is not None:
+        sys.stderr.write('%s: error: %s\n' % (parser.prog, sampler.error))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Bulk conversion of raw INA219 register words to engineering units.
+
+NumPy arrays are returned when NumPy is installed, otherwise `array.array`
+instances. Both are converted a column at a time rather than a float at a
+time, so raw words can be stored at capture time and converted later.
+"""
+from array import array
+import importlib
+from typing import Any, NamedTuple, Optional, Sequence
+
+BUS_VOLTS_LSB = 0.004  # 4mV
+SHUNT_MILLIVOLTS_LSB = 0.01  # 10uV
+WORDS = 4  # bus voltage, shunt voltage, current and power words per sample
+
+
+class Converted(NamedTuple):
+    """Columns of converted samples."""
+
+    voltage: Any  # bus voltage in volts
+    shunt_voltage: Any  # shunt voltage in millivolts
+    current: Any  # current in milliamps
+    power: Any  # power in milliwatts
+    overflow: Any  # true if the current/power values are invalid
+
+
+def _numpy() -> Optional[Any]:
+    try:
+        return importlib.import_module('numpy')
+    except ImportError:
+        return None
+
+
+def convert(words: Sequence[int], current_lsb: float, power_lsb: float,
+            use_numpy: Optional[bool] = None) -> Converted:
+    """Convert interleaved sample words, as drained from a RingBuffer.
+
+    Arguments:
+    words -- unsigned bus voltage, shunt voltage, current and power register
+        words, WORDS per sample.
+    current_lsb -- the current LSB in amps per bit, see INA219.current_lsb.
+    power_lsb -- the power LSB in watts per bit, see INA219.power_lsb.
+    use_numpy -- force (True) or avoid (False) NumPy, defaults to using
+        NumPy when it is installed.
+    """
+    numpy = _numpy() if use_numpy is not False else None
+    if numpy is not None:
+        columns = numpy.asarray(words, dtype=numpy.uint16).reshape(-1, WORDS)
+        return _convert_numpy(numpy, columns[:, 0], columns[:, 1],
+                              columns[:, 2], columns[:, 3],
+                              current_lsb, power_lsb)
+    if use_numpy:
+        raise ModuleNotFoundError('NumPy is not installed')
+    words = _as_array(words)
+    return convert_columns(words[0::WORDS], words[1::WORDS],
+                           words[2::WORDS], words[3::WORDS],
+                           current_lsb, power_lsb, use_numpy=False)
+
+
+def convert_columns(bus: Sequence[int], shunt: Sequence[int],
+                    current: Sequence[int], power: Sequence[int],
+                    current_lsb: float, power_lsb: float,
+                    use_numpy: Optional[bool] = None) -> Converted:
+    """Convert columns of unsigned register words.
+
+    Arguments:
+    bus -- bus voltage register words.
+    shunt -- shunt voltage register words.
+    current -- current register words.
+    power -- power register words.
+    current_lsb -- the current LSB in amps per bit, see INA219.current_lsb.
+    power_lsb -- the power LSB in watts per bit, see INA219.power_lsb.
+    use_numpy -- force (True) or avoid (False) NumPy, defaults to using
+        NumPy when it is installed.
+    """
+    numpy = _numpy() if use_numpy is not False else None
+    if numpy is not None:
+        return _convert_numpy(
+            numpy, numpy.asarray(bus, dtype=numpy.uint16),
+            numpy.asarray(shunt, dtype=numpy.uint16),
+            numpy.asarray(current, dtype=numpy.uint16),
+            numpy.asarray(power, dtype=numpy.uint16),
+            current_lsb, power_lsb)
+    if use_numpy:
+        raise ModuleNotFoundError('NumPy is not installed')
+
+    bus = _as_array(bus)
+    current_scale = current_lsb * 1000
+    power_scale = power_lsb * 1000
+    return Converted(
+        array('d', [(w >> 3) * BUS_VOLTS_LSB for w in bus]),
+        array('d', [w * SHUNT_MILLIVOLTS_LSB for w in _signed(shunt)]),
+        array('d', [w * current_scale for w in _signed(current)]),
+        array('d', [w * power_scale for w in power]),
+        array('b', [w & 1 for w in bus]))
+
+
+def _convert_numpy(numpy: Any, bus: Any, shunt: Any, current: Any,
+                   power: Any, current_lsb: float,
+                   power_lsb: float) -> Converted:
+    return Converted(
+        (bus >> 3) * BUS_VOLTS_LSB,
+        shunt.view(numpy.int16) * SHUNT_MILLIVOLTS_LSB,
+        current.view(numpy.int16) * (current_lsb * 1000),
+        power * (power_lsb * 1000),
+        (bus & 1).astype(bool))
+
+
+def _as_array(words: Sequence[int]) -> 'array[int]':
+    if isinstance(words, array) and words.typecode == 'H':
+        return words
+    return array('H', words)
+
+
+def _signed(words: Sequence[int]) -> 'array[int]':
+    # reinterpret the unsigned words as 2's complement, at C speed
+    return array('h', _as_array(words).tobytes())
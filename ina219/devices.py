@@ -0,0 +1,102 @@
+"""Management of many INA219 devices on one or more I2C buses."""
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import drivers
+from .ina219 import INA219, I2cDriver, Measurement
+
+
+class INA219Array:
+    """Several INA219 devices sampled together, sharing a driver per bus."""
+
+    def __init__(self, driver_factory: Callable[[int], I2cDriver] =
+                 drivers.auto) -> None:
+        """Construct the class.
+
+        Arguments:
+        driver_factory -- function loading the I2C driver of a bus number,
+            called once per bus.
+        """
+        self._driver_factory = driver_factory
+        self._drivers: Dict[int, I2cDriver] = {}
+        self.devices: List[INA219] = []
+
+    def driver(self, interface: int) -> I2cDriver:
+        """Return the I2C driver shared by all devices of a bus.
+
+        Arguments:
+        interface -- system I2C interface identifier
+        """
+        driver = self._drivers.get(interface)
+        if driver is None:
+            driver = self._drivers[interface] = \
+                self._driver_factory(interface)
+        return driver
+
+    def add(self, shunt_ohms: float,
+            max_expected_amps: Optional[float] = None,
+            address: int = INA219.I2C_ADDR_DEFAULT,
+            interface: int = INA219.BUSNUM_DEFAULT,
+            **kwargs: Any) -> INA219:
+        """Add a device and return its INA219 instance.
+
+        Arguments:
+        shunt_ohms -- value of shunt resistor in Ohms (mandatory).
+        max_expected_amps -- the maximum expected current in Amps (optional).
+        address -- the I2C address of the INA219 device
+        interface -- the I2C bus number the device is connected to
+        kwargs -- further INA219 constructor arguments
+        """
+        ina = INA219(shunt_ohms, max_expected_amps, address=address,
+                     i2c_driver=self.driver(interface), **kwargs)
+        self.devices.append(ina)
+        return ina
+
+    def configure(self, *args: Any, **kwargs: Any) -> None:
+        """Configure and calibrate all devices alike.
+
+        The arguments are the same as for INA219.configure().
+        """
+        for ina in self.devices:
+            ina.configure(*args, **kwargs)
+
+    def read_all(self, wait: bool = True,
+                 timeout: Optional[float] = None) -> List[Measurement]:
+        """Return a snapshot of every device, in the order they were added.
+
+        When waiting, the conversion ready flag of all devices is polled in
+        turn and each device is read as soon as its conversion completes, so
+        the conversions of the other devices overlap the bus transactions.
+        Otherwise the current register values are read right away. A
+        DeviceRangeError exception is thrown if current overflow occurs, a
+        TimeoutError exception if a device does not complete a conversion
+        in time, e.g. as it is powered down.
+
+        Arguments:
+        wait -- wait for a new conversion of every device (default).
+        timeout -- the time in seconds to wait for the conversions, defaults
+            to the longest INA219.conversion_timeout() of the devices.
+        """
+        if not wait:
+            return [ina.read_all() for ina in self.devices]
+
+        if timeout is None:
+            timeout = max((ina.conversion_timeout() for ina in self.devices),
+                          default=0.0)
+        deadline = time.monotonic() + timeout
+        results: List[Optional[Measurement]] = [None] * len(self.devices)
+        pending = list(enumerate(self.devices))
+        while True:
+            waiting = []
+            for index, ina in pending:
+                measurement = ina._poll_measurement(time.monotonic())
+                if measurement is None:
+                    waiting.append((index, ina))
+                else:
+                    results[index] = measurement
+            if not waiting:
+                return [m for m in results if m is not None]
+            if time.monotonic() >= deadline:
+                raise waiting[0][1]._conversion_timeout_error(timeout)
+            pending = waiting
+            time.sleep(min(ina.poll_interval() for _, ina in pending))
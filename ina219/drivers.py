@@ -1,8 +1,36 @@
+import ctypes
+import errno
 import logging
+import os
 import struct
-from typing import Any, cast, List
+import time
+from typing import (Any, Callable, cast, Dict, Iterable, List,
+                    MutableSequence, Optional, Sequence, Tuple, Type)
 
-from .ina219 import I2cDriver
+from .ina219 import bus_lock, INA219, I2cDriver
+
+# Linux i2c-dev ioctl definitions (linux/i2c-dev.h and linux/i2c.h)
+I2C_RDWR = 0x0707
+I2C_RDWR_IOCTL_MAX_MSGS = 42
+I2C_M_RD = 0x0001
+
+
+class _I2cMsg(ctypes.Structure):
+    _fields_ = [('addr', ctypes.c_uint16),
+                ('flags', ctypes.c_uint16),
+                ('len', ctypes.c_uint16),
+                ('buf', ctypes.POINTER(ctypes.c_uint8))]
+
+
+class _I2cRdwrIoctlData(ctypes.Structure):
+    _fields_ = [('msgs', ctypes.POINTER(_I2cMsg)),
+                ('nmsgs', ctypes.c_uint32)]
+
+
+def _on_bus(driver: I2cDriver, interface: int) -> I2cDriver:
+    # drivers loaded for the same interface share the lock of the bus
+    bus_lock(driver, interface)
+    return driver
 
 
 class SmbusDriver(I2cDriver):
@@ -16,15 +44,17 @@ class SmbusDriver(I2cDriver):
 
     def read_word(self, address: int, register: int,
                   signed: bool = False) -> int:
-        data = cast(List[int],
-                    self._i2c.read_i2c_block_data(address, register, 2))
-        return cast(int,
-                    struct.unpack('>h' if signed else '>H', bytes(data))[0])
+        msb, lsb = cast(List[int],
+                        self._i2c.read_i2c_block_data(address, register, 2))
+        value = msb << 8 | lsb
+        if signed and value & 0x8000:
+            value -= 0x10000
+        return value
 
     @classmethod
     def load(cls, interface: int) -> I2cDriver:
         from smbus import SMBus  # type: ignore
-        return cls(SMBus(interface))
+        return _on_bus(cls(SMBus(interface)), interface)
 
 
 class Smbus2Driver(SmbusDriver):
@@ -32,7 +62,7 @@ class Smbus2Driver(SmbusDriver):
     @classmethod
     def load(cls, interface: int) -> I2cDriver:
         from smbus2 import SMBus  # type: ignore
-        return cls(SMBus(interface))
+        return _on_bus(cls(SMBus(interface)), interface)
 
 
 class AdafruitDriver(SmbusDriver):
@@ -40,21 +70,391 @@ class AdafruitDriver(SmbusDriver):
     @classmethod
     def load(cls, interface: int) -> I2cDriver:
         import Adafruit_PureIO.smbus  # type: ignore
-        return cls(Adafruit_PureIO.smbus.SMBus(interface))
+        return _on_bus(cls(Adafruit_PureIO.smbus.SMBus(interface)),
+                       interface)
+
+
+class I2cDevDriver(I2cDriver):
+    """I2C driver using the Linux i2c-dev interface directly.
+
+    A register read is a single combined I2C_RDWR transaction (register
+    pointer write and 2 byte read), using buffers allocated once per driver.
+    Several registers are read in one ioctl, with buffers allocated once per
+    device address and register sequence, so read_words_into() allocates no
+    lists or buffers, only the ints of the register values. No third party
+    I2C module is required.
+    """
+
+    DEVICE_PATH = '/dev/i2c-%d'
+
+    def __init__(self, fd: int) -> None:
+        import fcntl
+        self._ioctl = fcntl.ioctl
+        self._fd = fd
+        self._pointer = (ctypes.c_uint8 * 1)()
+        self._word = (ctypes.c_uint8 * 2)()
+        self._read_msgs = (_I2cMsg * 2)()
+        self._read_msgs[0].len = 1
+        self._read_msgs[0].buf = self._pointer
+        self._read_msgs[1].flags = I2C_M_RD
+        self._read_msgs[1].len = 2
+        self._read_msgs[1].buf = self._word
+        self._read = _I2cRdwrIoctlData(self._read_msgs, 2)
+        self._bursts: Dict[Tuple[int, Tuple[int, ...]], Tuple[
+            _I2cRdwrIoctlData, ctypes.Array[ctypes.c_uint8],
+            struct.Struct]] = {}
+
+    def write(self, address: int, register: int, data: bytes) -> None:
+        buf = (ctypes.c_uint8 * (len(data) + 1))(register, *data)
+        msgs = (_I2cMsg * 1)()
+        msgs[0].addr = address
+        msgs[0].len = len(buf)
+        msgs[0].buf = buf
+        self._ioctl(self._fd, I2C_RDWR, _I2cRdwrIoctlData(msgs, 1))
+
+    def read_word(self, address: int, register: int,
+                  signed: bool = False) -> int:
+        msgs = self._read_msgs
+        msgs[0].addr = msgs[1].addr = address
+        self._pointer[0] = register
+        self._ioctl(self._fd, I2C_RDWR, self._read)
+        value = self._word[0] << 8 | self._word[1]
+        if signed and value & 0x8000:
+            value -= 0x10000
+        return value
+
+    def read_words(self, address: int,
+                   registers: Sequence[int]) -> List[int]:
+        burst = self.__cached_burst(address, registers)
+        if burst is None:
+            return super().read_words(address, registers)
+        data, words, unpacker = burst
+        self._ioctl(self._fd, I2C_RDWR, data)
+        return list(unpacker.unpack_from(words))
+
+    def read_words_into(self, address: int, registers: Sequence[int],
+                        values: MutableSequence[int]) -> None:
+        burst = self.__cached_burst(address, registers)
+        if burst is None:
+            super().read_words_into(address, registers, values)
+            return
+        data, words = burst[0], burst[1]
+        self._ioctl(self._fd, I2C_RDWR, data)
+        # a while loop, as range() allocates
+        index = 0
+        count = len(registers)
+        while index < count:
+            values[index] = words[2 * index] << 8 | words[2 * index + 1]
+            index += 1
+
+    def __cached_burst(self, address: int, registers: Sequence[int]) \
+            -> Optional[Tuple[_I2cRdwrIoctlData,
+                              'ctypes.Array[ctypes.c_uint8]', struct.Struct]]:
+        key = (address, tuple(registers))
+        burst = self._bursts.get(key)
+        if burst is None:
+            if len(registers) * 2 > I2C_RDWR_IOCTL_MAX_MSGS:
+                return None
+            burst = self._bursts[key] = self.__burst(address, registers)
+        return burst
+
+    @staticmethod
+    def __burst(address: int, registers: Sequence[int]) -> Tuple[
+            _I2cRdwrIoctlData, 'ctypes.Array[ctypes.c_uint8]', struct.Struct]:
+        count = len(registers)
+        words = (ctypes.c_uint8 * (count * 2))()
+        msgs = (_I2cMsg * (count * 2))()
+        for i, register in enumerate(registers):
+            msgs[2 * i].addr = msgs[2 * i + 1].addr = address
+            msgs[2 * i].len = 1
+            msgs[2 * i].buf = (ctypes.c_uint8 * 1)(register)
+            msgs[2 * i + 1].flags = I2C_M_RD
+            msgs[2 * i + 1].len = 2
+            msgs[2 * i + 1].buf = ctypes.cast(
+                ctypes.byref(words, 2 * i), ctypes.POINTER(ctypes.c_uint8))
+        # the ioctl data keeps references to the messages and their buffers,
+        # the words buffer is returned as the messages only point into it
+        data = _I2cRdwrIoctlData(msgs, count * 2)
+        return data, words, struct.Struct('>%dH' % count)
+
+    def close(self) -> None:
+        """Close the I2C device file."""
+        os.close(self._fd)
+
+    @classmethod
+    def load(cls, interface: int) -> I2cDriver:
+        return _on_bus(cls(os.open(cls.DEVICE_PATH % interface, os.O_RDWR)),
+                       interface)
+
+    @classmethod
+    def is_available(cls, interface: int) -> bool:
+        """Return true if the I2C device file of the interface is usable.
+
+        Arguments:
+        interface -- system I2C interface identifier
+        """
+        try:
+            import fcntl  # noqa: F401
+        except ImportError:
+            return False
+        return os.access(cls.DEVICE_PATH % interface, os.R_OK | os.W_OK)
+
+
+class _SimulatedDevice:
+
+    CONFIG_DEFAULT = 0x399F
+
+    def __init__(self, shunt_ohms: float, bus_volts: float,
+                 current_amps: float, now: float) -> None:
+        self.shunt_ohms = shunt_ohms
+        self.bus_volts = bus_volts
+        self.current_amps = current_amps
+        self.reset(now)
+
+    def reset(self, now: float) -> None:
+        self.configuration = self.CONFIG_DEFAULT
+        self.calibration = 0
+        self.restart(now)
+        self.shunt = 0
+        self.bus = 0
+
+    def restart(self, now: float) -> None:
+        # a configuration write aborts the running conversion and clears CNVR
+        self.started = now
+        self.converted = 0
+        self.cnvr = False
+
+    def conversion_time(self) -> float:
+        mode = self.configuration & 0x7
+        bus_adc = (self.configuration >> 7) & 0xF
+        shunt_adc = (self.configuration >> 3) & 0xF
+        seconds = 0.0
+        if mode & 0x1:
+            seconds += INA219.adc_conversion_time(shunt_adc)
+        if mode & 0x2:
+            seconds += INA219.adc_conversion_time(bus_adc)
+        return seconds
+
+    def update(self, now: float) -> None:
+        mode = self.configuration & 0x7
+        if mode in (0, 4):  # power-down or ADC off
+            return
+        conversions = int((now - self.started) / self.conversion_time())
+        if mode < 4:  # triggered, a single conversion
+            conversions = min(conversions, 1)
+        if conversions > self.converted:
+            self.converted = conversions
+            self.cnvr = True
+            if mode & 0x1:
+                pga = (self.configuration >> 11) & 0x3
+                full_scale = 4000 << pga
+                shunt = round(self.current_amps * self.shunt_ohms / 10e-6)
+                self.shunt = max(-full_scale, min(full_scale, shunt))
+            if mode & 0x2:
+                full_scale = 8000 if self.configuration & 0x2000 else 4000
+                bus = round(self.bus_volts / 4e-3)
+                self.bus = max(0, min(full_scale, bus))
+
+    def current(self) -> int:
+        return int(self.shunt * self.calibration / 4096)
+
+    def power(self) -> int:
+        return int(self.current() * self.bus / 5000)
+
+    def overflow(self) -> bool:
+        return not (-0x8000 <= self.current() <= 0x7FFF and
+                    abs(self.power()) <= 0xFFFF)
+
+    def read(self, register: int) -> int:
+        if register == 0x00:
+            return self.configuration
+        if register == 0x01:
+            return self.shunt & 0xFFFF
+        if register == 0x02:
+            return self.bus << 3 | self.cnvr << 1 | self.overflow()
+        if register == 0x03:
+            self.cnvr = False
+            return min(abs(self.power()), 0xFFFF)
+        if register == 0x04:
+            return max(-0x8000, min(0x7FFF, self.current())) & 0xFFFF
+        if register == 0x05:
+            return self.calibration
+        raise OSError(errno.EIO, 'Invalid INA219 register 0x%02x' % register)
+
+    def write(self, register: int, value: int, now: float) -> None:
+        if register == 0x00:
+            if value & 0x8000:
+                self.reset(now)
+            else:
+                self.configuration = value
+                self.restart(now)
+        elif register == 0x05:
+            self.calibration = value & 0xFFFE
+        else:
+            raise OSError(errno.EIO,
+                          'Register 0x%02x is read only' % register)
+
+
+class SimulatedINA219Driver(I2cDriver):
+    """Register accurate simulation of INA219 devices on an I2C bus.
+
+    Models the configuration and calibration registers, the current and
+    power calculations, the CNVR and OVF flags with ADC conversion timing,
+    the PGA range, reset and power-down. For testing and benchmarking
+    without hardware.
+    """
+
+    def __init__(self, addresses: Iterable[int] = (INA219.I2C_ADDR_DEFAULT,),
+                 shunt_ohms: float = 0.1, bus_volts: float = 5.0,
+                 current_amps: float = 0.1, latency: float = 0.0,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        """Construct the simulation.
+
+        Arguments:
+        addresses -- I2C addresses of the simulated devices.
+        shunt_ohms -- value of the shunt resistor in Ohms.
+        bus_volts -- the simulated bus voltage in volts.
+        current_amps -- the simulated current in amps.
+        latency -- the duration of a bus transaction in seconds.
+        clock -- monotonic clock returning seconds, driving conversions.
+        """
+        self._clock = clock
+        self.latency = latency
+        self.transactions = 0
+        self.devices = {address: _SimulatedDevice(
+            shunt_ohms, bus_volts, current_amps, clock())
+            for address in addresses}
+
+    def set_load(self, bus_volts: float, current_amps: float,
+                 address: Optional[int] = None) -> None:
+        """Change the simulated load, applied from the next conversion on.
+
+        Arguments:
+        bus_volts -- the bus voltage in volts.
+        current_amps -- the current in amps.
+        address -- the device address, defaults to all devices.
+        """
+        for device_address, device in self.devices.items():
+            if address is None or address == device_address:
+                device.bus_volts = bus_volts
+                device.current_amps = current_amps
+
+    def write(self, address: int, register: int, data: bytes) -> None:
+        device = self.__transaction(address)
+        device.write(register, data[0] << 8 | data[1], self._clock())
+
+    def read_word(self, address: int, register: int,
+                  signed: bool = False) -> int:
+        device = self.__transaction(address)
+        device.update(self._clock())
+        value = device.read(register)
+        if signed and value & 0x8000:
+            value -= 0x10000
+        return value
+
+    def read_words(self, address: int,
+                   registers: Sequence[int]) -> List[int]:
+        # a single combined transaction, as by I2cDevDriver
+        device = self.__transaction(address)
+        device.update(self._clock())
+        return [device.read(register) for register in registers]
+
+    def __transaction(self, address: int) -> _SimulatedDevice:
+        self.transactions += 1
+        if self.latency:
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+        device = self.devices.get(address)
+        if device is None:
+            raise OSError(errno.EREMOTEIO, os.strerror(errno.EREMOTEIO))
+        return device
+
+    @classmethod
+    def load(cls, interface: int) -> I2cDriver:
+        return _on_bus(cls(), interface)
+
+
+# Environment variable naming a file in which auto() remembers the driver
+# found per interface, so that later processes skip the discovery.
+DRIVER_CACHE_ENV = 'INA219_DRIVER_CACHE'
+
+_AUTO_DRIVERS: Dict[str, Type[I2cDriver]] = {
+    d.__name__: d for d in (I2cDevDriver, Smbus2Driver, SmbusDriver,
+                            AdafruitDriver)}
+
+# drivers found by auto() in this process, per interface
+_auto_drivers: Dict[int, Type[I2cDriver]] = {}
 
 
 def auto(interface: int) -> I2cDriver:
+    """Load the first I2C driver usable for an interface.
+
+    The driver found is remembered, in this process and in the file named
+    by the environment variable INA219_DRIVER_CACHE if set, and is tried
+    first by the next call, before the discovery of the other drivers.
+
+    Arguments:
+    interface -- system I2C interface identifier
+    """
+    cached = _auto_drivers.get(interface) or _read_driver_cache(interface)
+    if cached is not None:
+        try:
+            return _auto_load(cached, interface)
+        except (ImportError, OSError):
+            pass  # discover the drivers usable now
 
-    drivers = [Smbus2Driver, SmbusDriver, AdafruitDriver]
+    drivers: List[Type[I2cDriver]] = [Smbus2Driver, SmbusDriver,
+                                      AdafruitDriver]
+    if I2cDevDriver.is_available(interface):
+        drivers.insert(0, I2cDevDriver)
 
     for driver in drivers:
         try:
-            loaded = driver.load(interface)
-            logging.info(f'Auto-loading I2C driver: {driver.__name__}')
-            return loaded
+            loaded = _auto_load(driver, interface)
         except ImportError:
-            pass
+            continue
+        if driver is not cached:
+            _write_driver_cache(interface, driver)
+        return loaded
 
     raise ModuleNotFoundError('No compatible I2C module found. '
                               'Supported I2C driver modules are: '
                               f'{[d.__name__ for d in drivers]}')
+
+
+def _auto_load(driver: Type[I2cDriver], interface: int) -> I2cDriver:
+    loaded = driver.load(interface)
+    logging.info(f'Auto-loading I2C driver: {driver.__name__}')
+    _auto_drivers[interface] = driver
+    return loaded
+
+
+def _driver_cache(path: str) -> Dict[str, str]:
+    # one line per interface: "<interface> <driver class name>"
+    try:
+        with open(path) as file:
+            return dict(line.split() for line in file if line.strip())
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_driver_cache(interface: int) -> Optional[Type[I2cDriver]]:
+    path = os.environ.get(DRIVER_CACHE_ENV)
+    if not path:
+        return None
+    return _AUTO_DRIVERS.get(_driver_cache(path).get(str(interface), ''))
+
+
+def _write_driver_cache(interface: int, driver: Type[I2cDriver]) -> None:
+    path = os.environ.get(DRIVER_CACHE_ENV)
+    if not path:
+        return
+    entries = _driver_cache(path)
+    entries[str(interface)] = driver.__name__
+    try:
+        with open(path + '.tmp', 'w') as file:
+            file.writelines('%s %s\n' % entry for entry in entries.items())
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        logging.info(f'I2C driver cache not written: {e}')
@@ -5,10 +5,101 @@ Supports the Raspberry Pi using the I2C bus.
 import abc
 from enum import IntEnum
 import logging
-from math import trunc
+from math import sqrt, trunc
 import struct
+import threading
 import time
-from typing import Optional
+from typing import (Dict, List, MutableSequence, NamedTuple, Optional,
+                    Sequence, Tuple, TYPE_CHECKING)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .instrumentation import Metrics
+
+
+class Measurement(NamedTuple):
+    """Immutable snapshot of all INA219 measurements of one sample."""
+
+    timestamp: float  # time.monotonic() of the bus voltage read
+    voltage: float  # bus voltage in volts
+    shunt_voltage: float  # shunt voltage in millivolts
+    current: float  # bus current in milliamps
+    power: float  # bus power consumption in milliwatts
+    ready: bool = False  # conversion ready flag of the bus voltage read
+
+    @property
+    def supply_voltage(self) -> float:
+        """Return the bus supply voltage in volts."""
+        return self.voltage + self.shunt_voltage / 1000
+
+
+class MeasurementRecord:
+    """Mutable snapshot of all INA219 measurements of one sample.
+
+    Has the fields of a Measurement in slots. Reading into the same record
+    sample after sample with INA219.read_into() allocates no containers, so
+    high rate loops do not trigger garbage collections.
+    """
+
+    __slots__ = ('timestamp', 'voltage', 'shunt_voltage', 'current', 'power',
+                 'ready')
+
+    def __init__(self) -> None:
+        self.timestamp = 0.0  # time.monotonic() of the bus voltage read
+        self.voltage = 0.0  # bus voltage in volts
+        self.shunt_voltage = 0.0  # shunt voltage in millivolts
+        self.current = 0.0  # bus current in milliamps
+        self.power = 0.0  # bus power consumption in milliwatts
+        self.ready = False  # conversion ready flag of the bus voltage read
+
+    @property
+    def supply_voltage(self) -> float:
+        """Return the bus supply voltage in volts."""
+        return self.voltage + self.shunt_voltage / 1000
+
+    def set(self, timestamp: float, voltage: float, shunt_voltage: float,
+            current: float, power: float,
+            ready: bool = False) -> 'MeasurementRecord':
+        """Update all fields and return the record."""
+        self.timestamp = timestamp
+        self.voltage = voltage
+        self.shunt_voltage = shunt_voltage
+        self.current = current
+        self.power = power
+        self.ready = ready
+        return self
+
+    def measurement(self) -> Measurement:
+        """Return an immutable copy of the record."""
+        return Measurement(self.timestamp, self.voltage, self.shunt_voltage,
+                           self.current, self.power, self.ready)
+
+
+class Calibration(NamedTuple):
+    """Precomputed calibration of one bus voltage range and gain."""
+
+    voltage_range: int  # RANGE_16V or RANGE_32V
+    gain: int  # GAIN_1_40MV to GAIN_8_320MV
+    calibration: int  # calibration register value
+    current_lsb: float  # amps per bit
+    power_lsb: float  # watts per bit
+    max_current: float  # amps before the current register overflows
+    max_power: float  # watts at the maximum current and bus voltage
+    # shunt voltage register magnitude at which the shunt voltage saturates
+    # or the current register overflows
+    overflow_shunt: int
+    # auto gain steps down below these register magnitudes
+    step_down_shunt: int  # shunt voltage register
+    step_down_current: int  # current register
+
+
+class AdcPlan(NamedTuple):
+    """ADC settings for a target sample rate, see INA219.plan_adc()."""
+
+    bus_adc: int  # bus ADC setting, one of the ADC_* constants
+    shunt_adc: int  # shunt ADC setting, one of the ADC_* constants
+    conversion_time: float  # seconds between two conversions
+    bus_noise: float  # noise relative to a single 12-bit conversion
+    shunt_noise: float  # noise relative to a single 12-bit conversion
 
 
 class INA219:
@@ -25,7 +116,7 @@ class INA219:
 
     ADC_9BIT = 0  # 9-bit conversion time  84us.
     ADC_10BIT = 1  # 10-bit conversion time 148us.
-    ADC_11BIT = 2  # 11-bit conversion time 2766us.
+    ADC_11BIT = 2  # 11-bit conversion time 276us.
     ADC_12BIT = 3  # 12-bit conversion time 532us.
     ADC_2SAMP = 9  # 2 samples at 12-bit, conversion time 1.06ms.
     ADC_4SAMP = 10  # 4 samples at 12-bit, conversion time 2.13ms.
@@ -35,6 +126,21 @@ class INA219:
     ADC_64SAMP = 14  # 64 samples at 12-bit, conversion time 34.05ms.
     ADC_128SAMP = 15  # 128 samples at 12-bit, conversion time 68.10ms.
 
+    MODE_SHUNT_TRIGGERED = 1  # Shunt only, triggered
+    MODE_BUS_TRIGGERED = 2  # Bus only, triggered
+    MODE_TRIGGERED = 3  # Shunt and bus, triggered
+    MODE_SHUNT_CONTINUOUS = 5  # Shunt only, continuous
+    MODE_BUS_CONTINUOUS = 6  # Bus only, continuous
+    MODE_CONTINUOUS = 7  # Shunt and bus, continuous
+
+    WAKE_DELAY = 0.00004  # 40us delay to recover from powerdown (p14 of spec)
+
+    # Shortest default wait for a conversion, allowing for scheduling delays.
+    CONVERSION_TIMEOUT_MIN = 0.01
+    # Shortest sleep between two polls of the conversion ready flag, so the
+    # power-down and ADC off modes, which do not convert, do not busy-wait.
+    POLL_INTERVAL_MIN = 0.00005
+
     BUSNUM_DEFAULT = 1
 
     I2C_ADDR_DEFAULT = 0x40
@@ -77,27 +183,59 @@ class INA219:
     __MODE3 = 2
     __MODE2 = 1
     __MODE1 = 0
+    __MODE_MASK = 0x7
+    __MODE_POWER_DOWN = 0
 
     __OVF = 1
     __CNVR = 2
 
+    # Registers of a snapshot, the power register is read last as reading
+    # it clears the CNVR flag (p27 of spec).
+    __SNAPSHOT_REGISTERS = (__REG_BUSVOLTAGE, __REG_SHUNTVOLTAGE,
+                            __REG_CURRENT, __REG_POWER)
+    # Registers of a snapshot read after the bus voltage register
+    __CONVERSION_REGISTERS = __SNAPSHOT_REGISTERS[1:]
+
     __BUS_RANGE = [16, 32]
     __GAIN_VOLTS = [0.04, 0.08, 0.16, 0.32]
-
-    __CONT_SH_BUS = 7
-
+    # Shunt voltage register full scale per gain, it saturates beyond this
+    __GAIN_SHUNT_FULL_SCALE = [4000, 8000, 16000, 32000]
+
+    # ADC conversion times in seconds (p27 of spec), settings 4 to 8 are
+    # all a single 12-bit conversion.
+    __ADC_CONVERSION_TIMES = [84e-6, 148e-6, 276e-6, 532e-6,
+                              532e-6, 532e-6, 532e-6, 532e-6, 532e-6,
+                              1.06e-3, 2.13e-3, 4.26e-3, 8.51e-3,
+                              17.02e-3, 34.05e-3, 68.10e-3]
+
+    # ADC settings in order of increasing conversion time, settings 4 to 8
+    # duplicate ADC_12BIT.
+    __ADC_SETTINGS = (0, 1, 2, 3, 9, 10, 11, 12, 13, 14, 15)
+
+    __CONFIG_DEFAULT = 0x399F
+    # The calibration register bit 0 is void and always reads 0 (p28 of spec)
+    __REGISTER_MASKS = {__REG_CALIBRATION: 0xFFFE}
+
+    __VERIFY_ERR_MSG = ('Verification of register 0x%02x failed, '
+                        'wrote 0x%04x but read 0x%04x')
     __AMP_ERR_MSG = ('Expected current %.3fA is greater '
                      'than max possible current %.3fA')
     __RNG_ERR_MSG = ('Expected amps %.2fA, out of range, use a lower '
                      'value shunt resistor')
+    __PLAN_ERR_MSG = ('No ADC settings achieve %.1f samples per second '
+                      'with a noise of at most %.2f')
     __VOLT_ERR_MSG = ('Invalid voltage range, must be one of: '
                       'RANGE_16V, RANGE_32V')
+    __TRIGGER_ERR_MSG = ('Mode %d is not triggered, must be one of: '
+                         'MODE_SHUNT_TRIGGERED, MODE_BUS_TRIGGERED, '
+                         'MODE_TRIGGERED')
 
     __LOG_MSG_1 = ('shunt ohms: %.3f, bus max volts: %d, '
                    'shunt volts max: %.2f%s, '
                    'bus ADC: %d, shunt ADC: %d')
-    __LOG_MSG_2 = ('calibrate called with: bus max volts: %dV, '
-                   'max shunt volts: %.2fV%s')
+    __LOG_MSG_2 = ('calibration for max shunt volts: %.2fV%s: '
+                   '0x%04x (%d), current LSB: %.3e A/bit, '
+                   'power LSB: %.3e W/bit, max current: %.4fA')
     __LOG_MSG_3 = ('Current overflow detected - '
                    'attempting to increase gain')
 
@@ -116,7 +254,9 @@ class INA219:
                  busnum: Optional[int] = None,
                  address: int = I2C_ADDR_DEFAULT,
                  log_level: Optional[int] = None,
-                 i2c_driver: Optional['I2cDriver'] = None) -> None:
+                 i2c_driver: Optional['I2cDriver'] = None,
+                 shadow_registers: bool = False,
+                 verify_writes: bool = False) -> None:
         """Construct the class.
 
         Pass in the resistance of the shunt resistor and the maximum expected
@@ -129,6 +269,11 @@ class INA219:
         address -- the I2C address of the INA219 device
         log_level -- deprecated and ignored
         i2c_driver -- the I2C driver to be used for I2C communication
+        shadow_registers -- cache the configuration and calibration
+            registers written by the library instead of reading them back
+            from the device, see resync() (optional).
+        verify_writes -- read back every register write and raise an
+            IOError if the device value differs, for debugging (optional).
         """
         self.logger = logging.getLogger(__name__)
 
@@ -163,16 +308,36 @@ class INA219:
             'I2C driver class must be a subclass of I2cDriver'
 
         self._i2c = i2c_driver
+        # held across each logical operation, shared by all devices on a bus
+        self._lock = bus_lock(i2c_driver)
         self._address = address
         self._shunt_ohms = shunt_ohms
         self._max_expected_amps = max_expected_amps
+        self._shadow: Optional[Dict[int, int]] = \
+            {} if shadow_registers else None
+        self._verify_writes = verify_writes
         self._min_device_current_lsb = self._calculate_min_current_lsb()
         self._gain: Optional[int] = None
         self._auto_gain_enabled = False
+        self._gain_hysteresis = 0.8
+        self._gain_step_down_samples = 16
+        self._gain_samples = 0
+        # calibration tables per configured gain, see calibration_table
+        self._calibration_tables: Dict[int, Tuple[Calibration, ...]] = {}
+        self._calibration_table: Tuple[Calibration, ...] = ()
+        self._bus_adc = self.ADC_12BIT
+        self._shunt_adc = self.ADC_12BIT
+        self._mode = self.MODE_CONTINUOUS
+        self._powered_down = False  # by sleep(), until the mode is written
+        self._triggered_at = 0.0
+        # register words read into, only used while holding the lock
+        self._snapshot = [0] * len(self.__SNAPSHOT_REGISTERS)
+        self._conversion = [0] * len(self.__CONVERSION_REGISTERS)
 
     def configure(self, voltage_range: int = RANGE_32V, gain: int = GAIN_AUTO,
                   bus_adc: int = ADC_12BIT,
-                  shunt_adc: int = ADC_12BIT) -> None:
+                  shunt_adc: int = ADC_12BIT,
+                  mode: int = MODE_CONTINUOUS) -> None:
         """Configure and calibrate how the INA219 will take measurements.
 
         Arguments:
@@ -195,40 +360,86 @@ class INA219:
             ADC_10BIT, ADC_11BIT, ADC_12BIT (default),
             ADC_2SAMP, ADC_4SAMP, ADC_8SAMP, ADC_16SAMP,
             ADC_32SAMP, ADC_64SAMP, ADC_128SAMP
+        mode -- The operating mode represented by one of the following
+            constants; MODE_CONTINUOUS (default), MODE_TRIGGERED,
+            MODE_SHUNT_CONTINUOUS, MODE_SHUNT_TRIGGERED,
+            MODE_BUS_CONTINUOUS, MODE_BUS_TRIGGERED. In triggered mode a
+            conversion is only taken after trigger() and the device powers
+            down between conversions. Converting only the shunt or bus
+            voltage shortens the conversion time, in shunt only modes the
+            current and shunt voltage are read without the bus voltage
+            register, the power is based on the last bus voltage converted.
         """
-        self.__validate_voltage_range(voltage_range)
-        self._voltage_range = voltage_range
-
-        if self._max_expected_amps is not None:
-            if gain == self.GAIN_AUTO:
-                self._auto_gain_enabled = True
-                self._gain = self._determine_gain(self._max_expected_amps)
-            else:
-                self._gain = gain
-        else:
-            if gain != self.GAIN_AUTO:
-                self._gain = gain
+        with self._lock:
+            self.__validate_voltage_range(voltage_range)
+            self._voltage_range = voltage_range
+            self._bus_adc = bus_adc
+            self._shunt_adc = shunt_adc
+            self._mode = mode
+
+            if self._max_expected_amps is not None:
+                if gain == self.GAIN_AUTO:
+                    self._auto_gain_enabled = True
+                    self._gain = self._determine_gain(self._max_expected_amps)
+                else:
+                    self._gain = gain
             else:
-                self._auto_gain_enabled = True
-                self._gain = self.GAIN_1_40MV
-
-        self.logger.info('gain set to %.2fV' % self.__GAIN_VOLTS[self._gain])
+                if gain != self.GAIN_AUTO:
+                    self._gain = gain
+                else:
+                    self._auto_gain_enabled = True
+                    self._gain = self.GAIN_1_40MV
+
+            self.logger.info('gain set to %.2fV',
+                             self.__GAIN_VOLTS[self._gain])
+
+            self.logger.debug(
+                self.__LOG_MSG_1,
+                self._shunt_ohms, self.__BUS_RANGE[voltage_range],
+                self.__GAIN_VOLTS[self._gain],
+                self.__max_expected_amps_to_string(self._max_expected_amps),
+                bus_adc, shunt_adc)
+
+            self._configured_gain = self._gain
+            self._calibration_table = self.__calibration_table(self._gain)
+            self.__apply_calibration(self._gain)
+            self._configure(voltage_range, self._gain, bus_adc, shunt_adc,
+                            mode)
+            self._gain_samples = 0
+
+    def configure_auto_gain(self, hysteresis: float = 0.8,
+                            step_down_samples: int = 16) -> None:
+        """Configure how the automatic gain steps up and down.
+
+        On current overflow the gain is increased straight to the lowest
+        gain whose range holds the shunt voltage with the given headroom.
+        The gain is decreased once that many consecutive samples fit into a
+        lower gain with the same headroom, so a transient spike does not
+        cost resolution for good.
 
-        self.logger.debug(
-            self.__LOG_MSG_1 %
-            (self._shunt_ohms, self.__BUS_RANGE[voltage_range],
-             self.__GAIN_VOLTS[self._gain],
-             self.__max_expected_amps_to_string(self._max_expected_amps),
-             bus_adc, shunt_adc))
-
-        self._calibrate(
-            self.__BUS_RANGE[voltage_range], self.__GAIN_VOLTS[self._gain],
-            self._max_expected_amps)
-        self._configure(voltage_range, self._gain, bus_adc, shunt_adc)
+        Arguments:
+        hysteresis -- fraction of the range of a gain a reading must stay
+            below to select that gain (default 0.8).
+        step_down_samples -- consecutive readings below the threshold of a
+            lower gain before stepping down, 0 disables stepping down
+            (default 16).
+        """
+        with self._lock:
+            if not 0 < hysteresis <= 1:
+                raise ValueError('hysteresis must be greater than 0 and at '
+                                 'most 1')
+            self._gain_hysteresis = hysteresis
+            self._gain_step_down_samples = step_down_samples
+            self._gain_samples = 0
+            self._calibration_tables.clear()
+            if self._calibration_table:
+                self._calibration_table = \
+                    self.__calibration_table(self._configured_gain)
 
     def voltage(self) -> float:
         """Return the bus voltage in volts."""
-        value = self._voltage_register()
+        with self._lock:
+            value = self._voltage_register()
         return float(value) * self.__BUS_MILLIVOLTS_LSB / 1000
 
     def supply_voltage(self) -> float:
@@ -237,68 +448,482 @@ class INA219:
         This is the sum of the bus voltage and shunt voltage. A
         DeviceRangeError exception is thrown if current overflow occurs.
         """
-        return self.voltage() + (float(self.shunt_voltage()) / 1000)
+        with self._lock:
+            return self.voltage() + (float(self.shunt_voltage()) / 1000)
 
     def current(self) -> float:
         """Return the bus current in milliamps.
 
         A DeviceRangeError exception is thrown if current overflow occurs.
         """
-        self._handle_current_overflow()
-        return self._current_register() * self._current_lsb * 1000
+        with self._lock:
+            if self._mode & (1 << self.__MODE2):
+                self._handle_current_overflow()
+                register_value = self._current_register()
+            else:
+                register_value = self._read_shunt_only(
+                    (self.__REG_SHUNTVOLTAGE, self.__REG_CURRENT))[1]
+            current = register_value * self._current_lsb * 1000
+            if self._auto_gain_enabled:
+                self._track_gain(register_value, False)
+            return current
 
     def power(self) -> float:
         """Return the bus power consumption in milliwatts.
 
         A DeviceRangeError exception is thrown if current overflow occurs.
         """
-        self._handle_current_overflow()
-        return self._power_register() * self._power_lsb * 1000
+        with self._lock:
+            self._handle_current_overflow()
+            return self._power_register() * self._power_lsb * 1000
 
     def shunt_voltage(self) -> float:
         """Return the shunt voltage in millivolts.
 
         A DeviceRangeError exception is thrown if current overflow occurs.
         """
-        self._handle_current_overflow()
-        return self._shunt_voltage_register() * self.__SHUNT_MILLIVOLTS_LSB
+        with self._lock:
+            if self._mode & (1 << self.__MODE2):
+                self._handle_current_overflow()
+                register_value = self._shunt_voltage_register()
+            else:
+                register_value = self._read_shunt_only(
+                    (self.__REG_SHUNTVOLTAGE,))[0]
+            if self._auto_gain_enabled:
+                self._track_gain(register_value, True)
+            return register_value * self.__SHUNT_MILLIVOLTS_LSB
+
+    def read_all(self) -> Measurement:
+        """Return a snapshot of bus voltage, shunt voltage, current and power.
+
+        Each register is read only once per snapshot, the current overflow
+        check uses the same bus voltage register read as the voltage. A
+        DeviceRangeError exception is thrown if current overflow occurs.
+        """
+        with self._lock:
+            timestamp = time.monotonic()
+            words = self.__read_registers_into(self.__SNAPSHOT_REGISTERS,
+                                               self._snapshot)
+            if words[0] & self.__OVF:
+                timestamp = time.monotonic()
+                return self._measure(self._handle_current_overflow(),
+                                     timestamp)
+            measurement = self.__measurement(timestamp, words[0], words[1],
+                                             words[2], words[3])
+            if self._auto_gain_enabled:
+                self._track_gain(self.__signed(words[1]), True)
+            return measurement
+
+    def read_into(self, record: MeasurementRecord) -> MeasurementRecord:
+        """Read a snapshot like read_all() into a reusable record.
+
+        The registers are read into a buffer of this instance and the record
+        is updated in place, so no containers are allocated per sample, only
+        the numbers, which the garbage collector does not track. Returns the
+        record. A DeviceRangeError exception is thrown if current overflow
+        occurs.
+
+        Arguments:
+        record -- the MeasurementRecord to update.
+        """
+        # unlike a with statement acquire() and release() allocate nothing
+        lock = self._lock
+        lock.acquire()
+        try:
+            timestamp = time.monotonic()
+            words = self.__read_registers_into(self.__SNAPSHOT_REGISTERS,
+                                               self._snapshot)
+            if words[0] & self.__OVF:
+                # the gain changes, allocating does not matter here
+                return record.set(*self._measure(
+                    self._handle_current_overflow(), time.monotonic()))
+            # converted as by __measurement(), without a bound method
+            record.set(
+                timestamp,
+                float(words[0] >> 3) * self.__BUS_MILLIVOLTS_LSB / 1000,
+                self.__signed(words[1]) * self.__SHUNT_MILLIVOLTS_LSB,
+                self.__signed(words[2]) * self._current_lsb * 1000,
+                words[3] * self._power_lsb * 1000,
+                words[0] & self.__CNVR != 0)
+            if self._auto_gain_enabled:
+                self._track_gain(self.__signed(words[1]), True)
+            return record
+        finally:
+            lock.release()
+
+    def trigger(self) -> None:
+        """Start a single conversion of the shunt and/or bus voltage.
+
+        The device must have been configured with a triggered mode, it powers
+        down once the conversion is complete. This costs a single write of
+        the configuration register, use result() to read the measurement.
+        A ValueError exception is thrown if the mode is not triggered.
+        """
+        with self._lock:
+            assert self._gain is not None, \
+                'configure() must be called before trigger()'
+            if not (self.MODE_SHUNT_TRIGGERED <= self._mode <=
+                    self.MODE_TRIGGERED):
+                raise ValueError(self.__TRIGGER_ERR_MSG % self._mode)
+            self._configure(self._voltage_range, self._gain, self._bus_adc,
+                            self._shunt_adc, self._mode)
+            self._triggered_at = time.monotonic()
+
+    def result(self, blocking: bool = True,
+               timeout: Optional[float] = None) -> Optional[Measurement]:
+        """Return the measurement of the conversion started by trigger().
+
+        When blocking, sleep for the expected conversion time and then poll
+        the conversion ready flag until the conversion completes. Otherwise
+        return None if the conversion is not complete yet. A
+        DeviceRangeError exception is thrown if current overflow occurs, a
+        TimeoutError exception if the conversion does not complete in time,
+        e.g. as trigger() was not called.
+
+        Arguments:
+        blocking -- wait for the conversion to complete (default).
+        timeout -- the time in seconds to wait for the conversion, defaults
+            to conversion_timeout().
+        """
+        if timeout is None:
+            timeout = self.conversion_timeout()
+        deadline = time.monotonic() + timeout
+        if blocking:
+            remaining = self._triggered_at + self.conversion_time() - \
+                time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        while True:
+            measurement = self._poll_measurement(time.monotonic())
+            if measurement is not None or not blocking:
+                return measurement
+            if time.monotonic() >= deadline:
+                raise self._conversion_timeout_error(timeout)
+            time.sleep(self.poll_interval())
 
     def sleep(self) -> None:
         """Put the INA219 into power down mode."""
-        configuration = self._read_configuration()
-        self._configuration_register(configuration & 0xFFF8)
+        with self._lock:
+            configuration = self._read_configuration()
+            self._configuration_register(configuration & 0xFFF8)
 
     def wake(self) -> None:
         """Wake the INA219 from power down mode."""
-        configuration = self._read_configuration()
-        self._configuration_register(configuration | 0x0007)
-        # 40us delay to recover from powerdown (p14 of spec)
-        time.sleep(0.00004)
+        self._power_up()
+        time.sleep(self.WAKE_DELAY)
 
     def current_overflow(self) -> bool:
         """Return true if the sensor has detect current overflow.
 
         In this case the current and power values are invalid.
         """
-        return self._has_current_overflow()
+        with self._lock:
+            return self._has_current_overflow()
 
     def reset(self) -> None:
         """Reset the INA219 to its default configuration."""
-        self._configuration_register(1 << self.__RST)
+        with self._lock:
+            self._configuration_register(1 << self.__RST)
+
+    def resync(self) -> None:
+        """Reload the shadow registers from the device.
+
+        Only required if the device registers were changed other than by
+        this instance, e.g. by a power cycle of the device.
+        """
+        with self._lock:
+            if self._shadow is not None:
+                self._shadow.clear()
+                for register in (self.__REG_CONFIG, self.__REG_CALIBRATION):
+                    self._shadow[register] = self.__read_register(register)
+
+    def enable_metrics(self, metrics: Optional['Metrics'] = None) -> 'Metrics':
+        """Record the bus transactions of this instance and return the metrics.
+
+        Instrumentation wraps the I2C driver of this instance only, other
+        instances sharing the driver are not recorded unless they are passed
+        the same metrics. Without instrumentation there is no overhead.
+
+        Arguments:
+        metrics -- the ina219.instrumentation.Metrics to record in, defaults
+            to new metrics.
+        """
+        from .instrumentation import InstrumentedDriver, Metrics
+        with self._lock:
+            if metrics is None:
+                metrics = Metrics()
+            if isinstance(self._i2c, InstrumentedDriver):
+                self._i2c.metrics = metrics
+            else:
+                self._i2c = InstrumentedDriver(self._i2c, metrics)
+            return metrics
+
+    def disable_metrics(self) -> None:
+        """Stop recording the bus transactions of this instance."""
+        from .instrumentation import InstrumentedDriver
+        with self._lock:
+            if isinstance(self._i2c, InstrumentedDriver):
+                self._i2c = self._i2c.driver
+
+    @property
+    def metrics(self) -> Optional['Metrics']:
+        """Return the bus transaction metrics, None unless enabled."""
+        from .instrumentation import InstrumentedDriver
+        if isinstance(self._i2c, InstrumentedDriver):
+            return self._i2c.metrics
+        return None
+
+    def restore(self) -> None:
+        """Rewrite the calibration and configuration registers.
+
+        Recovers the configured state after a reset() or power cycle of the
+        device with two register writes, from the calibration table.
+        """
+        with self._lock:
+            assert self._gain is not None, \
+                'configure() must be called before restore()'
+            self.__apply_calibration(self._gain)
+            self._configure(self._voltage_range, self._gain, self._bus_adc,
+                            self._shunt_adc, self._mode)
+
+    @property
+    def calibration_table(self) -> Tuple[Calibration, ...]:
+        """Return the calibration of every bus voltage range and gain.
+
+        Computed by configure(), the gain configured is calibrated for the
+        maximum expected current, all other gains for the maximum current
+        of their range. Empty until configured.
+        """
+        return self._calibration_table
 
     def is_conversion_ready(self) -> bool:
         """Check if conversion of a new reading has occured."""
-        cnvr = self._read_voltage_register() & self.__CNVR
-        return (cnvr == self.__CNVR)
+        with self._lock:
+            cnvr = self._read_voltage_register() & self.__CNVR
+            return (cnvr == self.__CNVR)
+
+    @classmethod
+    def adc_conversion_time(cls, adc: int) -> float:
+        """Return the conversion time in seconds of an ADC setting.
+
+        Arguments:
+        adc -- one of the ADC_* constants, e.g. ADC_12BIT or ADC_128SAMP.
+        """
+        return cls.__ADC_CONVERSION_TIMES[adc]
+
+    @classmethod
+    def adc_noise(cls, adc: int) -> float:
+        """Return the noise of an ADC setting.
+
+        The noise is relative to a single 12-bit conversion: each bit less
+        doubles the quantization noise, averaging n samples divides the
+        noise by the square root of n.
+
+        Arguments:
+        adc -- one of the ADC_* constants, e.g. ADC_12BIT or ADC_128SAMP.
+        """
+        if adc < cls.ADC_12BIT:
+            return float(1 << (cls.ADC_12BIT - adc))
+        if adc <= cls.ADC_2SAMP - 1:
+            return 1.0
+        return 1 / sqrt(1 << (adc - cls.ADC_2SAMP + 1))
+
+    @classmethod
+    def plan_adc(cls, rate: float, max_noise: float = 8.0,
+                 mode: int = MODE_CONTINUOUS) -> AdcPlan:
+        """Return the ADC settings averaging the most within a sample rate.
 
-    def _handle_current_overflow(self) -> None:
+        The bus and shunt voltages are converted in turn, the sum of their
+        conversion times must not exceed the sample period. Of the settings
+        within the period, those with the lowest noise of the noisier
+        channel are chosen, preferring a lower shunt voltage noise and then
+        a shorter conversion time. Averaging on the device reduces the
+        noise without any further I2C reads.
+
+        In the shunt and bus only modes the whole period is spent on the
+        voltage converted, the other keeps ADC_12BIT and is not taken
+        into account.
+
+        Arguments:
+        rate -- the target number of samples per second.
+        max_noise -- the maximum noise of either channel, relative to a
+            single 12-bit conversion (default 8.0, a 9-bit conversion). A
+            ValueError is raised if the rate cannot be achieved within it.
+        mode -- the operating mode, one of the MODE_* constants.
+        """
+        period = 1 / rate
+        bus = bool(mode & (1 << cls.__MODE2))
+        shunt = bool(mode & (1 << cls.__MODE1))
+        best: Optional[AdcPlan] = None
+        best_key: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+        for bus_adc in cls.__ADC_SETTINGS if bus else (cls.ADC_12BIT,):
+            for shunt_adc in cls.__ADC_SETTINGS if shunt \
+                    else (cls.ADC_12BIT,):
+                plan = AdcPlan(
+                    bus_adc, shunt_adc,
+                    cls.mode_conversion_time(mode, bus_adc, shunt_adc),
+                    cls.adc_noise(bus_adc), cls.adc_noise(shunt_adc))
+                noise = max(plan.bus_noise if bus else 0.0,
+                            plan.shunt_noise if shunt else 0.0)
+                if plan.conversion_time > period or noise > max_noise:
+                    continue
+                key = (noise, plan.shunt_noise if shunt else 0.0,
+                       plan.conversion_time)
+                if best is None or key < best_key:
+                    best, best_key = plan, key
+        if best is None:
+            raise ValueError(cls.__PLAN_ERR_MSG % (rate, max_noise))
+        return best
+
+    def configure_for_rate(self, rate: float, max_noise: float = 8.0,
+                           voltage_range: int = RANGE_32V,
+                           gain: int = GAIN_AUTO,
+                           mode: int = MODE_CONTINUOUS) -> AdcPlan:
+        """Configure the ADC settings averaging the most within a rate.
+
+        See plan_adc() for the arguments rate, max_noise and mode and
+        configure() for the others. Returns the AdcPlan configured.
+        """
+        plan = self.plan_adc(rate, max_noise, mode)
+        self.configure(voltage_range, gain, plan.bus_adc, plan.shunt_adc,
+                       mode)
+        return plan
+
+    def conversion_time(self) -> float:
+        """Return the time in seconds between two continuous conversions.
+
+        This is the sum of the configured bus and shunt ADC conversion
+        times, as both are converted in turn, or that of the only voltage
+        converted in the shunt and bus only modes.
+        """
+        return self.mode_conversion_time(self._mode, self._bus_adc,
+                                         self._shunt_adc)
+
+    def conversion_timeout(self) -> float:
+        """Return the default time in seconds to wait for a new conversion.
+
+        This is four conversion times, but at least CONVERSION_TIMEOUT_MIN.
+        When no conversion completes in time the device is powered down,
+        waiting for a trigger or disconnected.
+        """
+        return max(4 * self.conversion_time(), self.CONVERSION_TIMEOUT_MIN)
+
+    def poll_interval(self) -> float:
+        """Return the time in seconds to sleep between two polls of the
+        conversion ready flag.
+
+        This is a twentieth of the conversion time, but at least
+        POLL_INTERVAL_MIN.
+        """
+        return max(self.conversion_time() / 20, self.POLL_INTERVAL_MIN)
+
+    @classmethod
+    def mode_conversion_time(cls, mode: int, bus_adc: int,
+                             shunt_adc: int) -> float:
+        """Return the conversion time in seconds of a mode and ADC settings.
+
+        Arguments:
+        mode -- one of the MODE_* constants.
+        bus_adc -- the bus ADC setting, one of the ADC_* constants.
+        shunt_adc -- the shunt ADC setting, one of the ADC_* constants.
+        """
+        seconds = 0.0
+        if mode & (1 << cls.__MODE2):
+            seconds += cls.__ADC_CONVERSION_TIMES[bus_adc]
+        if mode & (1 << cls.__MODE1):
+            seconds += cls.__ADC_CONVERSION_TIMES[shunt_adc]
+        return seconds
+
+    @property
+    def current_lsb(self) -> float:
+        """Return the current register LSB in amps per bit."""
+        return self._current_lsb
+
+    @property
+    def calibration(self) -> int:
+        """Return the calibration register value."""
+        return self._calibration
+
+    @property
+    def power_lsb(self) -> float:
+        """Return the power register LSB in watts per bit."""
+        return self._power_lsb
+
+    def _poll_measurement(self, timestamp: float) -> Optional[Measurement]:
+        with self._lock:
+            voltage_register = self._handle_current_overflow()
+            if voltage_register & self.__CNVR:
+                return self._measure(voltage_register, timestamp)
+            return None
+
+    def _conversion_timeout_error(self, timeout: float) -> TimeoutError:
+        return TimeoutError(
+            'No conversion of the INA219 at 0x%02x within %.3fs' %
+            (self._address, timeout))
+
+    def _read_raw(self, words: List[int]) -> List[int]:
+        lock = self._lock
+        lock.acquire()
+        try:
+            return self.__read_registers_into(self.__SNAPSHOT_REGISTERS,
+                                              words)
+        finally:
+            lock.release()
+
+    def _poll_raw(self, words: List[int]) -> Optional[List[int]]:
+        lock = self._lock
+        lock.acquire()
+        try:
+            voltage_register = self._read_voltage_register()
+            if not voltage_register & self.__CNVR:
+                return None
+            conversion = self.__read_registers_into(
+                self.__CONVERSION_REGISTERS, self._conversion)
+            words[0] = voltage_register
+            words[1] = conversion[0]
+            words[2] = conversion[1]
+            words[3] = conversion[2]
+            return words
+        finally:
+            lock.release()
+
+    def _power_up(self) -> None:
+        with self._lock:
+            configuration = self._read_configuration()
+            self._configuration_register(configuration & 0xFFF8 | self._mode)
+
+    def _handle_current_overflow(self) -> int:
+        voltage_register = self._read_voltage_register()
         if self._auto_gain_enabled:
-            while self._has_current_overflow():
+            while voltage_register & self.__OVF:
                 self._increase_gain()
-        else:
-            if self._has_current_overflow():
-                raise DeviceRangeError(
-                    self.__GAIN_VOLTS[self._gain] if self._gain else 0.0)
+                voltage_register = self._read_voltage_register()
+        elif voltage_register & self.__OVF:
+            raise DeviceRangeError(
+                self.__GAIN_VOLTS[self._gain] if self._gain else 0.0)
+        return voltage_register
+
+    def _measure(self, voltage_register: int,
+                 timestamp: float) -> Measurement:
+        words = self.__read_registers_into(self.__CONVERSION_REGISTERS,
+                                           self._conversion)
+        measurement = self.__measurement(timestamp, voltage_register,
+                                         words[0], words[1], words[2])
+        if self._auto_gain_enabled:
+            self._track_gain(self.__signed(words[0]), True)
+        return measurement
+
+    def __measurement(self, timestamp: float, voltage_register: int,
+                      shunt_voltage_register: int, current_register: int,
+                      power_register: int) -> Measurement:
+        return Measurement(
+            timestamp,
+            float(voltage_register >> 3) * self.__BUS_MILLIVOLTS_LSB / 1000,
+            self.__signed(shunt_voltage_register) *
+            self.__SHUNT_MILLIVOLTS_LSB,
+            self.__signed(current_register) * self._current_lsb * 1000,
+            power_register * self._power_lsb * 1000,
+            voltage_register & self.__CNVR != 0)
 
     def _determine_gain(self, max_expected_amps: float) -> int:
         shunt_v = max_expected_amps * self._shunt_ohms
@@ -309,66 +934,150 @@ class INA219:
 
     def _increase_gain(self) -> None:
         self.logger.info(self.__LOG_MSG_3)
-        gain = self._read_gain()
+        gain = self._gain
+        assert gain is not None
         if gain < len(self.__GAIN_VOLTS) - 1:
-            gain = gain + 1
-            self._calibrate(self.__BUS_RANGE[self._voltage_range],
-                            self.__GAIN_VOLTS[gain])
-            self._configure_gain(gain)
-            # 1ms delay required for new configuration to take effect,
-            # otherwise invalid current/power readings can occur.
-            time.sleep(0.001)
+            # Unless the shunt voltage saturated the range of the gain, the
+            # overflow is in the current calculation and the shunt voltage
+            # tells the gain needed. Otherwise only the largest range is
+            # certain to hold it.
+            shunt = abs(self._shunt_voltage_register())
+            if shunt < self.__GAIN_SHUNT_FULL_SCALE[gain]:
+                gain = self.__gain_for_shunt(shunt, gain + 1)
+            else:
+                gain = len(self.__GAIN_VOLTS) - 1
+            self._set_gain(gain)
         else:
             self.logger.info('Device limit reach, gain cannot be increased')
             raise DeviceRangeError(self.__GAIN_VOLTS[gain], True)
 
+    def _read_shunt_only(self, registers: Sequence[int]) -> List[int]:
+        # Without bus voltage conversions the overflow flag is not read, it
+        # is derived from the shunt voltage: saturated at the full scale of
+        # the gain, or beyond the range of the current register.
+        while True:
+            values = [self.__signed(value)
+                      for value in self.__read_registers(registers)]
+            gain = self._gain
+            assert gain is not None, \
+                'configure() must be called before reading the current'
+            setting = self._calibration_table[
+                self._voltage_range * len(self.__GAIN_VOLTS) + gain]
+            if abs(values[0]) < setting.overflow_shunt:
+                return values
+            if not self._auto_gain_enabled:
+                raise DeviceRangeError(self.__GAIN_VOLTS[gain])
+            self._increase_gain()
+
+    def _track_gain(self, register_value: int, shunt: bool) -> None:
+        # Count consecutive readings fitting into a lower gain, a single
+        # comparison per reading until a step down is due.
+        # Readings while powered down are stale, they are not tracked.
+        if not self._gain or not self._gain_step_down_samples or \
+                self._powered_down:
+            return
+        setting = self._calibration_table[
+            self._voltage_range * len(self.__GAIN_VOLTS) + self._gain]
+        threshold = setting.step_down_shunt if shunt \
+            else setting.step_down_current
+        if abs(register_value) >= threshold:
+            self._gain_samples = 0
+            return
+        self._gain_samples += 1
+        if self._gain_samples >= self._gain_step_down_samples:
+            if shunt:
+                shunt_counts = abs(register_value)
+            else:
+                shunt_counts = trunc(abs(register_value) *
+                                     setting.current_lsb * self._shunt_ohms /
+                                     (self.__SHUNT_MILLIVOLTS_LSB / 1000))
+            self._set_gain(self.__gain_for_shunt(shunt_counts, 0))
+
+    def _set_gain(self, gain: int) -> None:
+        # Switching gain writes the precomputed calibration and the
+        # configuration from the stored settings, without reading back. A
+        # device powered down by sleep() stays powered down.
+        self.__apply_calibration(gain)
+        self._configure(self._voltage_range, gain, self._bus_adc,
+                        self._shunt_adc,
+                        self.__MODE_POWER_DOWN if self._powered_down
+                        else self._mode)
+        self._gain = gain
+        self._gain_samples = 0
+        self.logger.info("gain set to: %.2fV", self.__GAIN_VOLTS[gain])
+        # 1ms delay required for new configuration to take effect,
+        # otherwise invalid current/power readings can occur.
+        time.sleep(0.001)
+
+    def __gain_for_shunt(self, shunt: int, minimum: int) -> int:
+        for gain in range(minimum, len(self.__GAIN_VOLTS) - 1):
+            if shunt < self.__GAIN_SHUNT_FULL_SCALE[gain] * \
+                    self._gain_hysteresis:
+                return gain
+        return len(self.__GAIN_VOLTS) - 1
+
+    def __apply_calibration(self, gain: int) -> None:
+        setting = self._calibration_table[
+            self._voltage_range * len(self.__GAIN_VOLTS) + gain]
+        self._current_lsb = setting.current_lsb
+        self._power_lsb = setting.power_lsb
+        self._calibration = setting.calibration
+        self._calibration_register(setting.calibration)
+
+    def __calibration_table(self, home_gain: int) -> Tuple[Calibration, ...]:
+        # Computed once per configured gain, as the shunt resistance and
+        # the maximum expected current are fixed at construction.
+        table = self._calibration_tables.get(home_gain)
+        if table is not None:
+            return table
+        gains = []
+        for gain, shunt_volts_max in enumerate(self.__GAIN_VOLTS):
+            max_expected_amps = self._max_expected_amps \
+                if gain == home_gain else None
+            max_possible_amps = shunt_volts_max / self._shunt_ohms
+            current_lsb = self._determine_current_lsb(
+                max_expected_amps, max_possible_amps)
+            calibration = trunc(self.__CALIBRATION_FACTOR /
+                                (current_lsb * self._shunt_ohms))
+            step_down_volts = self.__GAIN_VOLTS[max(gain - 1, 0)] * \
+                self._gain_hysteresis
+            overflow_shunt = min(
+                self.__GAIN_SHUNT_FULL_SCALE[gain],
+                -(-0x8000 * 4096 // calibration))  # rounded up
+            gains.append((
+                gain, calibration, current_lsb, current_lsb * 20,
+                current_lsb * 32767, overflow_shunt,
+                round(step_down_volts / (self.__SHUNT_MILLIVOLTS_LSB / 1000)),
+                round(step_down_volts / self._shunt_ohms / current_lsb)))
+            if gain == home_gain:
+                self.logger.info(
+                    self.__LOG_MSG_2, shunt_volts_max,
+                    self.__max_expected_amps_to_string(max_expected_amps),
+                    calibration, calibration, current_lsb, current_lsb * 20,
+                    current_lsb * 32767)
+        table = self._calibration_tables[home_gain] = tuple(
+            Calibration(voltage_range, gain, calibration, current_lsb,
+                        power_lsb, max_current, max_current * bus_volts_max,
+                        overflow_shunt, step_down_shunt, step_down_current)
+            for voltage_range, bus_volts_max in enumerate(self.__BUS_RANGE)
+            for (gain, calibration, current_lsb, power_lsb, max_current,
+                 overflow_shunt, step_down_shunt, step_down_current) in gains)
+        return table
+
     def _configure(self, voltage_range: int, gain: int, bus_adc: int,
-                   shunt_adc: int) -> None:
+                   shunt_adc: int, mode: int = MODE_CONTINUOUS) -> None:
         configuration = (
             voltage_range << self.__BRNG | gain << self.__PG0 |
-            bus_adc << self.__BADC1 | shunt_adc << self.__SADC1 |
-            self.__CONT_SH_BUS)
+            bus_adc << self.__BADC1 | shunt_adc << self.__SADC1 | mode)
         self._configuration_register(configuration)
 
-    def _calibrate(self, bus_volts_max: int, shunt_volts_max: float,
-                   max_expected_amps: Optional[float] = None) -> None:
-        self.logger.info(
-            self.__LOG_MSG_2 %
-            (bus_volts_max, shunt_volts_max,
-             self.__max_expected_amps_to_string(max_expected_amps)))
-
-        max_possible_amps = shunt_volts_max / self._shunt_ohms
-
-        self.logger.info("max possible current: %.3fA" %
-                         max_possible_amps)
-
-        self._current_lsb = \
-            self._determine_current_lsb(max_expected_amps, max_possible_amps)
-        self.logger.info("current LSB: %.3e A/bit" % self._current_lsb)
-
-        self._power_lsb = self._current_lsb * 20
-        self.logger.info("power LSB: %.3e W/bit" % self._power_lsb)
-
-        max_current = self._current_lsb * 32767
-        self.logger.info("max current before overflow: %.4fA" % max_current)
-
-        max_shunt_voltage = max_current * self._shunt_ohms
-        self.logger.info("max shunt voltage before overflow: %.4fmV" %
-                         (max_shunt_voltage * 1000))
-
-        calibration = trunc(self.__CALIBRATION_FACTOR /
-                            (self._current_lsb * self._shunt_ohms))
-        self.logger.info(
-            "calibration: 0x%04x (%d)" % (calibration, calibration))
-        self._calibration_register(calibration)
-
     def _determine_current_lsb(self, max_expected_amps: Optional[float],
                                max_possible_amps: float) -> float:
         if max_expected_amps is not None:
             if max_expected_amps > round(max_possible_amps, 3):
                 raise ValueError(self.__AMP_ERR_MSG %
                                  (max_expected_amps, max_possible_amps))
-            self.logger.info("max expected current: %.3fA" %
+            self.logger.info("max expected current: %.3fA",
                              max_expected_amps)
             if max_expected_amps < max_possible_amps:
                 current_lsb = max_expected_amps / self.__CURRENT_LSB_FACTOR
@@ -382,31 +1091,23 @@ class INA219:
         return current_lsb
 
     def _configuration_register(self, register_value: int) -> None:
-        self.logger.debug("configuration: 0x%04x" % register_value)
+        self.logger.debug("configuration: 0x%04x", register_value)
         self.__write_register(self.__REG_CONFIG, register_value)
+        # a reset powers up in the default continuous mode
+        self._powered_down = not register_value & (
+            1 << self.__RST | self.__MODE_MASK)
 
     def _read_configuration(self) -> int:
+        if self._shadow is not None and self.__REG_CONFIG in self._shadow:
+            return self._shadow[self.__REG_CONFIG]
         return self.__read_register(self.__REG_CONFIG)
 
     def _calculate_min_current_lsb(self) -> float:
         return self.__CALIBRATION_FACTOR / \
             (self._shunt_ohms * self.__MAX_CALIBRATION_VALUE)
 
-    def _read_gain(self) -> int:
-        configuration = self._read_configuration()
-        gain = (configuration & 0x1800) >> self.__PG0
-        self.logger.info("gain is currently: %.2fV" % self.__GAIN_VOLTS[gain])
-        return gain
-
-    def _configure_gain(self, gain: int) -> None:
-        configuration = self._read_configuration()
-        configuration = configuration & 0xE7FF
-        self._configuration_register(configuration | (gain << self.__PG0))
-        self._gain = gain
-        self.logger.info("gain set to: %.2fV" % self.__GAIN_VOLTS[gain])
-
     def _calibration_register(self, register_value: int) -> None:
-        self.logger.debug("calibration: 0x%04x" % register_value)
+        self.logger.debug("calibration: 0x%04x", register_value)
         self.__write_register(self.__REG_CALIBRATION, register_value)
 
     def _has_current_overflow(self) -> bool:
@@ -434,18 +1135,68 @@ class INA219:
             raise ValueError(self.__VOLT_ERR_MSG)
 
     def __write_register(self, register: int, value: int) -> None:
-        self.logger.debug(
-            "write register 0x%02x: 0x%04x 0b%s" %
-            (register, value, self.__binary_as_string(value)))
+        # Register tracing is compiled out with `python -O`, otherwise it
+        # costs a single level check when debug logging is disabled.
+        if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "write register 0x%02x: 0x%04x 0b%s",
+                register, value, self.__binary_as_string(value))
         self._i2c.write(self._address, register, struct.pack('>H', value))
+        if register == self.__REG_CONFIG and value & (1 << self.__RST):
+            # The reset bit self-clears and restores the register defaults
+            device_values = {self.__REG_CONFIG: self.__CONFIG_DEFAULT,
+                             self.__REG_CALIBRATION: 0}
+        else:
+            device_values = {register: value & self.__REGISTER_MASKS.get(
+                register, 0xFFFF)}
+        if self._verify_writes:
+            for device_register, device_value in device_values.items():
+                read_value = self.__read_register(device_register)
+                if read_value != device_value:
+                    raise IOError(self.__VERIFY_ERR_MSG % (
+                        device_register, device_value, read_value))
+        if self._shadow is not None:
+            self._shadow.update(device_values)
 
     def __read_register(self, register: int, signed: bool = False) -> int:
         value = self._i2c.read_word(self._address, register, signed)
-        self.logger.debug(
-            "read register 0x%02x: 0x%04x 0b%s" %
-            (register, value, self.__binary_as_string(value)))
+        if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "read register 0x%02x: 0x%04x 0b%s",
+                register, value, self.__binary_as_string(value))
         return value
 
+    def __read_registers(self, registers: Sequence[int]) -> List[int]:
+        read_words = getattr(self._i2c, 'read_words', None)
+        if read_words is None:
+            # drivers registered with I2cDriver.register() may lack it
+            values = I2cDriver.read_words(self._i2c, self._address, registers)
+        else:
+            values = read_words(self._address, registers)
+        if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+            for register, value in zip(registers, values):
+                self.logger.debug(
+                    "read register 0x%02x: 0x%04x 0b%s",
+                    register, value, self.__binary_as_string(value))
+        return values
+
+    def __read_registers_into(self, registers: Sequence[int],
+                              values: List[int]) -> List[int]:
+        getattr(type(self._i2c), 'read_words_into',
+                I2cDriver.read_words_into)(
+            self._i2c, self._address, registers, values)
+        if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+            for register, value in zip(registers, values):
+                self.logger.debug(
+                    "read register 0x%02x: 0x%04x 0b%s",
+                    register, value, self.__binary_as_string(value))
+        return values
+
+    @staticmethod
+    def __signed(register_value: int) -> int:
+        return register_value - 0x10000 if register_value & 0x8000 \
+            else register_value
+
     def __binary_as_string(self, register_value: int) -> str:
         return bin(register_value)[2:].zfill(16)
 
@@ -473,12 +1224,46 @@ class DeviceRangeError(Exception):
         self.device_limit_reached = device_max
 
 
+_bus_locks: Dict[int, 'threading.RLock'] = {}
+_bus_locks_lock = threading.Lock()
+
+
+def bus_lock(driver: 'I2cDriver',
+             interface: Optional[int] = None) -> 'threading.RLock':
+    """Return the lock arbitrating the access to the bus of an I2C driver.
+
+    INA219 instances hold the lock of their driver across each logical
+    operation, e.g. the current overflow check and the current read, or the
+    recalibration and reconfiguration of an automatic gain change, so that
+    threads sharing a bus never interleave their transactions. Drivers
+    loaded for the same interface share one lock, any other driver gets its
+    own lock on first use. Devices on different buses never contend.
+
+    Arguments:
+    driver -- the I2C driver of the bus
+    interface -- system I2C interface identifier, to share the lock with
+        all other drivers loaded for that interface (optional).
+    """
+    lock = vars(driver).get('_bus_lock')
+    if lock is None or interface is not None:
+        with _bus_locks_lock:
+            if interface is not None:
+                lock = _bus_locks.setdefault(interface, threading.RLock())
+                vars(driver)['_bus_lock'] = lock
+            else:
+                lock = vars(driver).setdefault('_bus_lock', threading.RLock())
+    return lock
+
+
 class I2cDriver(abc.ABC):
     """Abstract super class of an I2C driver, defining required
        I2C communication primitives.
 
     Implementations must ensure that the network byte order ("big endian",
-    MSB first) is followed for read and write operations.
+    MSB first) is followed for read and write operations. They need not be
+    thread safe, INA219 serializes the operations on a bus, see bus_lock().
+    load() should pass its interface to bus_lock(), so all drivers of an
+    interface share its lock.
     """
 
     @classmethod
@@ -513,3 +1298,40 @@ class I2cDriver(abc.ABC):
         Returns:
         (int) -- A 16 bit integer (MSB first).
         """
+
+    def read_words(self, address: int,
+                   registers: Sequence[int]) -> List[int]:
+        """Read (16-bit) words from several register addresses of the device.
+
+        Drivers able to combine the reads into fewer bus transactions should
+        override this, by default each register is read in turn.
+
+        Arguments:
+        address -- I2C slave address of the device to read from
+        registers -- register addresses from which to read, in order.
+        Returns:
+        (list) -- unsigned 16 bit integers (MSB first), one per register.
+        """
+        return [self.read_word(address, register) for register in registers]
+
+    def read_words_into(self, address: int, registers: Sequence[int],
+                        values: MutableSequence[int]) -> None:
+        """Read (16-bit) words like read_words(), into a preallocated sequence.
+
+        Drivers able to read without allocating lists or buffers should
+        override this, by default the words returned by read_words() are
+        copied.
+
+        Arguments:
+        address -- I2C slave address of the device to read from
+        registers -- register addresses from which to read, in order.
+        values -- sequence receiving the unsigned 16 bit integers (MSB
+                  first), one per register from index 0.
+        """
+        if hasattr(self, 'read_words'):
+            words = self.read_words(address, registers)
+        else:
+            # drivers registered with register() may lack it
+            words = I2cDriver.read_words(self, address, registers)
+        for index, value in enumerate(words):
+            values[index] = value
@@ -0,0 +1,212 @@
+"""Instrumentation of the I2C bus transactions of INA219 devices.
+
+An InstrumentedDriver wraps any I2cDriver and records the transactions,
+bytes, errors and latencies per operation and register in a Metrics object.
+Instrumentation is enabled per device with INA219.enable_metrics(), until
+then the driver is not wrapped and there is no overhead at all.
+"""
+import time
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+from .ina219 import bus_lock, I2cDriver
+
+# A register address, or the register addresses of a combined read.
+Registers = Union[int, Tuple[int, ...]]
+
+
+class OperationMetrics:
+    """Counters of the transactions of one operation on one register.
+
+    Latencies are recorded in a histogram of power of two microsecond
+    buckets: bucket 0 holds transactions shorter than 1us and bucket n those
+    of at least 2**(n-1)us and less than 2**n us.
+    """
+
+    BUCKETS = 32
+
+    __slots__ = ('transactions', 'bytes', 'errors', 'seconds', 'histogram')
+
+    def __init__(self) -> None:
+        self.transactions = 0
+        self.bytes = 0
+        self.errors = 0
+        self.seconds = 0.0  # total bus time
+        self.histogram = [0] * self.BUCKETS
+
+    def record(self, nbytes: int, seconds: float, error: bool) -> None:
+        """Record a transaction.
+
+        Arguments:
+        nbytes -- the number of data bytes transferred.
+        seconds -- the duration of the transaction.
+        error -- true if the transaction failed.
+        """
+        self.transactions += 1
+        self.seconds += seconds
+        if error:
+            self.errors += 1
+        else:
+            self.bytes += nbytes
+        bucket = int(seconds * 1e6).bit_length()
+        self.histogram[min(bucket, self.BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Return an upper bound of a latency percentile in seconds.
+
+        Arguments:
+        fraction -- the percentile as a fraction, e.g. 0.99.
+        """
+        remaining = fraction * self.transactions
+        for bucket, count in enumerate(self.histogram):
+            remaining -= count
+            if remaining <= 0 and count:
+                return (1 << bucket) / 1e6
+        return 0.0
+
+
+class Metrics:
+    """Bus transaction metrics, keyed by operation and register.
+
+    Operations are 'write', 'read' and 'read_words', the latter being a
+    single combined transaction reading several registers.
+    """
+
+    def __init__(self,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        """Construct the class.
+
+        Arguments:
+        clock -- clock returning seconds, used to time the transactions.
+        """
+        self.clock = clock
+        self.operations: Dict[Tuple[str, Registers], OperationMetrics] = {}
+
+    def __iter__(self) -> Iterator[Tuple[str, Registers, OperationMetrics]]:
+        for (operation, registers), metrics in sorted(
+                self.operations.items(), key=lambda item: str(item[0])):
+            yield operation, registers, metrics
+
+    def get(self, operation: str, registers: Registers) -> OperationMetrics:
+        """Return the metrics of an operation on a register, created empty.
+
+        Arguments:
+        operation -- one of 'write', 'read' or 'read_words'.
+        registers -- the register address, a tuple for 'read_words'.
+        """
+        key = (operation, registers)
+        metrics = self.operations.get(key)
+        if metrics is None:
+            metrics = self.operations[key] = OperationMetrics()
+        return metrics
+
+    @property
+    def transactions(self) -> int:
+        """Return the total number of bus transactions."""
+        return sum(m.transactions for m in self.operations.values())
+
+    @property
+    def bytes(self) -> int:
+        """Return the total number of data bytes transferred."""
+        return sum(m.bytes for m in self.operations.values())
+
+    @property
+    def errors(self) -> int:
+        """Return the total number of failed transactions."""
+        return sum(m.errors for m in self.operations.values())
+
+    @property
+    def seconds(self) -> float:
+        """Return the total bus time in seconds."""
+        return sum(m.seconds for m in self.operations.values())
+
+    def reset(self) -> None:
+        """Discard all recorded metrics."""
+        self.operations.clear()
+
+    def report(self) -> str:
+        """Return a table of the metrics, one line per operation."""
+        lines = ['%-10s %-20s %8s %8s %6s %10s %10s' % (
+            'operation', 'registers', 'xfers', 'bytes', 'errors',
+            'mean us', 'p99 us')]
+        for operation, registers, metrics in self:
+            if isinstance(registers, tuple):
+                name = ','.join('0x%02x' % r for r in registers)
+            else:
+                name = '0x%02x' % registers
+            mean = metrics.seconds / metrics.transactions
+            lines.append('%-10s %-20s %8d %8d %6d %10.1f %10.0f' % (
+                operation, name, metrics.transactions, metrics.bytes,
+                metrics.errors, mean * 1e6, metrics.percentile(0.99) * 1e6))
+        return '\n'.join(lines)
+
+
+class InstrumentedDriver(I2cDriver):
+    """I2C driver recording the transactions of another driver."""
+
+    def __init__(self, driver: I2cDriver, metrics: Metrics) -> None:
+        """Construct the class.
+
+        Arguments:
+        driver -- the I2C driver performing the transactions.
+        metrics -- the metrics to record the transactions in.
+        """
+        self._driver = driver
+        self.metrics = metrics
+        self._bus_lock = bus_lock(driver)
+        # Drivers without a combined read fall back to the default
+        # implementation, so each register read is recorded in turn.
+        self._combined = getattr(type(driver), 'read_words',
+                                 I2cDriver.read_words) \
+            is not I2cDriver.read_words
+
+    @property
+    def driver(self) -> I2cDriver:
+        """Return the wrapped I2C driver."""
+        return self._driver
+
+    @classmethod
+    def load(cls, interface: int) -> I2cDriver:
+        from . import drivers
+        return cls(drivers.auto(interface), Metrics())
+
+    def write(self, address: int, register: int, data: bytes) -> None:
+        metrics = self.metrics
+        start = metrics.clock()
+        try:
+            self._driver.write(address, register, data)
+        except BaseException:
+            metrics.get('write', register).record(
+                len(data), metrics.clock() - start, True)
+            raise
+        metrics.get('write', register).record(
+            len(data), metrics.clock() - start, False)
+
+    def read_word(self, address: int, register: int,
+                  signed: bool = False) -> int:
+        metrics = self.metrics
+        start = metrics.clock()
+        try:
+            value = self._driver.read_word(address, register, signed)
+        except BaseException:
+            metrics.get('read', register).record(
+                2, metrics.clock() - start, True)
+            raise
+        metrics.get('read', register).record(2, metrics.clock() - start, False)
+        return value
+
+    def read_words(self, address: int,
+                   registers: Sequence[int]) -> List[int]:
+        if not self._combined:
+            return super().read_words(address, registers)
+        metrics = self.metrics
+        key = tuple(registers)
+        start = metrics.clock()
+        try:
+            values = self._driver.read_words(address, registers)
+        except BaseException:
+            metrics.get('read_words', key).record(
+                2 * len(key), metrics.clock() - start, True)
+            raise
+        metrics.get('read_words', key).record(
+            2 * len(key), metrics.clock() - start, False)
+        return values
@@ -0,0 +1,436 @@
+"""Sampling of INA219 measurements paced by the device conversions."""
+from array import array
+import heapq
+import threading
+import time
+from typing import (Any, Callable, Dict, Iterator, List, NamedTuple,
+                    Optional, Sequence, Tuple)
+
+from .ina219 import INA219, Measurement
+
+
+class ConversionSampler:
+    """Return each new conversion of an INA219 exactly once.
+
+    The expected conversion time is derived from the configured bus and shunt
+    ADC settings. Most of that interval is slept, then the conversion ready
+    (CNVR) flag is polled until the conversion completes. Reading the
+    measurement clears the flag, so a conversion is never returned twice.
+    """
+
+    def __init__(self, ina: INA219, sleep_fraction: float = 0.9,
+                 poll_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 timeout: Optional[float] = None) -> None:
+        """Construct the sampler.
+
+        Arguments:
+        ina -- a configured INA219 instance.
+        sleep_fraction -- fraction of the conversion time to sleep before
+            polling the conversion ready flag.
+        poll_interval -- delay in seconds between two polls of the
+            conversion ready flag, defaults to INA219.poll_interval().
+        clock -- monotonic clock returning seconds, used for timestamps.
+        sleep -- function sleeping for the given number of seconds.
+        timeout -- the time in seconds to wait for a conversion, defaults to
+            INA219.conversion_timeout().
+        """
+        self._ina = ina
+        self._sleep_fraction = sleep_fraction
+        self._poll_interval = poll_interval
+        self._timeout = timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._last: Optional[float] = None
+        self.samples = 0
+        self.missed = 0
+        self.polls = 0
+
+    def __iter__(self) -> Iterator[Measurement]:
+        while True:
+            yield self.read()
+
+    def read(self) -> Measurement:
+        """Wait for the next conversion and return its measurement.
+
+        A DeviceRangeError exception is thrown if current overflow occurs, a
+        TimeoutError exception if no conversion completes in time, e.g. as
+        the device is powered down.
+        """
+        period = self._ina.conversion_time()
+        poll_interval = self._poll_interval
+        if poll_interval is None:
+            poll_interval = self._ina.poll_interval()
+        timeout = self._timeout
+        if timeout is None:
+            timeout = self._ina.conversion_timeout()
+        deadline = self._clock() + timeout
+
+        if self._last is not None:
+            remaining = self._last + period * self._sleep_fraction - \
+                self._clock()
+            if remaining > 0:
+                self._sleep(remaining)
+
+        while True:
+            self.polls += 1
+            measurement = self._ina._poll_measurement(self._clock())
+            if measurement is not None:
+                break
+            if self._clock() >= deadline:
+                raise self._ina._conversion_timeout_error(timeout)
+            self._sleep(poll_interval)
+
+        if self._last is not None:
+            # Conversions overwritten before being read cannot be
+            # recovered, but they can be counted.
+            elapsed = measurement.timestamp - self._last
+            self.missed += max(0, int(elapsed / period + 0.5) - 1)
+        self._last = measurement.timestamp
+        self.samples += 1
+        return measurement
+
+
+class RingBuffer:
+    """Preallocated ring buffer of timestamped raw register words.
+
+    Each sample holds the bus voltage, shunt voltage, current and power
+    register words, unsigned and in this order. There is no lock: a single
+    producer appends samples and a single consumer drains them. When the
+    consumer falls behind, the oldest samples are overwritten and counted
+    as dropped. Of a full buffer capacity - 1 samples are drained, as the
+    slot of the oldest one may be being overwritten.
+    """
+
+    WORDS = 4  # register words per sample
+
+    def __init__(self, capacity: int) -> None:
+        """Construct the class.
+
+        Arguments:
+        capacity -- the maximum number of samples held.
+        """
+        self.capacity = capacity
+        self.timestamps = array('d', [0.0]) * capacity
+        self.words = array('H', [0]) * (capacity * self.WORDS)
+        self.dropped = 0
+        self._written = 0  # only updated by the producer
+        self._read = 0  # only updated by the consumer
+
+    def __len__(self) -> int:
+        return min(self._written - self._read, self.capacity)
+
+    def append(self, timestamp: float, words: Sequence[int]) -> None:
+        """Append a sample, overwriting the oldest one if full.
+
+        Arguments:
+        timestamp -- the time of the sample in seconds.
+        words -- the bus voltage, shunt voltage, current and power
+            register words.
+        """
+        index = self._written % self.capacity
+        self.timestamps[index] = timestamp
+        base = index * self.WORDS
+        buffer = self.words
+        buffer[base] = words[0]
+        buffer[base + 1] = words[1]
+        buffer[base + 2] = words[2]
+        buffer[base + 3] = words[3]
+        # publish the sample only once it is complete
+        self._written += 1
+
+    def drain(self) -> Tuple['array[float]', 'array[int]']:
+        """Remove and return all samples, oldest first.
+
+        Returns:
+        (tuple) -- an array of the timestamps and an array of the register
+            words, WORDS per sample.
+        """
+        written = self._written
+        start = max(self._read, written - self.capacity)
+        timestamps = self.__copy(self.timestamps, start, written, 1)
+        words = self.__copy(self.words, start, written, self.WORDS)
+        # Samples overwritten by the producer while copying are invalid, as
+        # is the one in the slot of the sample it may be writing right now.
+        overwritten = self._written + 1 - self.capacity - start
+        if overwritten > 0:
+            del timestamps[:overwritten]
+            del words[:overwritten * self.WORDS]
+            start += overwritten
+        self.dropped += start - self._read
+        self._read = written
+        return timestamps, words
+
+    def __copy(self, buffer: 'array[Any]', start: int, stop: int,
+               width: int) -> 'array[Any]':
+        begin = start % self.capacity * width
+        end = stop % self.capacity * width
+        if stop - start == self.capacity or (stop > start and end <= begin):
+            return buffer[begin:] + buffer[:end]
+        return buffer[begin:end]
+
+
+class BackgroundSampler:
+    """Capture raw register words of an INA219 in a background thread.
+
+    Samples are taken either at a fixed rate or paced by the conversion
+    ready flag, and written to a RingBuffer without creating measurement
+    objects. Consumers drain the buffer in bulk, see ina219.convert for the
+    conversion to engineering units. Current overflow is not handled while
+    sampling, it is flagged by the OVF bit of the bus voltage word.
+    """
+
+    def __init__(self, ina: INA219, rate: Optional[float] = None,
+                 capacity: int = 65536,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Construct the sampler.
+
+        Arguments:
+        ina -- a configured INA219 instance.
+        rate -- samples per second, defaults to every new conversion.
+        capacity -- the number of samples held by the ring buffer.
+        clock -- monotonic clock returning seconds, used for timestamps.
+        """
+        self._ina = ina
+        self._rate = rate
+        self._clock = clock
+        self.buffer = RingBuffer(capacity)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[BaseException] = None
+
+    def __enter__(self) -> 'BackgroundSampler':
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='ina219-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def drain(self) -> Tuple['array[float]', 'array[int]']:
+        """Remove and return all captured samples, see RingBuffer.drain()."""
+        return self.buffer.drain()
+
+    def _run(self) -> None:
+        try:
+            if self._rate is None:
+                self._run_conversion_ready()
+            else:
+                self._run_fixed_rate(1 / self._rate)
+        except BaseException as e:
+            self.error = e
+            raise
+
+    def _run_fixed_rate(self, period: float) -> None:
+        append = self.buffer.append
+        read_raw = self._ina._read_raw
+        clock = self._clock
+        buffer = [0] * RingBuffer.WORDS
+        deadline = clock()
+        while not self._stop.is_set():
+            timestamp = clock()
+            append(timestamp, read_raw(buffer))
+            deadline += period
+            remaining = deadline - clock()
+            if remaining > 0:
+                self._stop.wait(remaining)
+            else:
+                # fell behind, do not try to catch up with a burst
+                deadline = clock()
+
+    def _run_conversion_ready(self) -> None:
+        append = self.buffer.append
+        poll_raw = self._ina._poll_raw
+        clock = self._clock
+        period = self._ina.conversion_time()
+        poll_interval = self._ina.poll_interval()
+        buffer = [0] * RingBuffer.WORDS
+        while not self._stop.is_set():
+            timestamp = clock()
+            words: Optional[List[int]] = poll_raw(buffer)
+            if words is None:
+                time.sleep(poll_interval)
+                continue
+            append(timestamp, words)
+            remaining = timestamp + period * 0.9 - clock()
+            if remaining > 0:
+                time.sleep(remaining)
+
+
+class Sample(NamedTuple):
+    """Raw register words of one device, captured by a MultiBusSampler."""
+
+    timestamp: float
+    device: int  # index of the device in MultiBusSampler.devices
+    words: Tuple[int, ...]  # bus voltage, shunt voltage, current and power
+
+
+class MultiBusSampler:
+    """Capture raw register words of devices on several I2C buses at once.
+
+    One background thread per bus samples the devices of that bus in turn,
+    either at a fixed rate or paced by their conversion ready flags, into a
+    RingBuffer per device. The I2C drivers release the GIL while a bus
+    transaction is in progress, so the buses are busy concurrently and the
+    throughput scales with their number. Devices whose drivers share a bus
+    lock share a thread, see ina219.bus_lock(). The samples of all devices
+    are drained merged in timestamp order.
+
+    Samples are lost when a bus falls behind, they are counted per device:
+    periods skipped at a fixed rate, conversions missed when paced by the
+    conversion ready flags and samples overwritten before being drained.
+    """
+
+    def __init__(self, devices: Sequence[INA219],
+                 rate: Optional[float] = None, capacity: int = 65536,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Construct the sampler.
+
+        Arguments:
+        devices -- configured INA219 instances, e.g. INA219Array.devices.
+        rate -- samples per second of each device, defaults to every new
+            conversion.
+        capacity -- the number of samples held by the ring buffer of each
+            device.
+        clock -- monotonic clock returning seconds, used for timestamps.
+        """
+        self.devices = list(devices)
+        self.buffers = [RingBuffer(capacity) for _ in self.devices]
+        self._rate = rate
+        self._clock = clock
+        buses: Dict[int, List[int]] = {}
+        for index, ina in enumerate(self.devices):
+            buses.setdefault(id(ina._lock), []).append(index)
+        self._buses = list(buses.values())  # device indexes per bus
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.error: Optional[BaseException] = None
+        # per device, only updated by the thread of its bus
+        self.skipped = [0] * len(self.devices)  # periods at a fixed rate
+        self.missed = [0] * len(self.devices)  # conversions not read
+
+    def __enter__(self) -> 'MultiBusSampler':
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    @property
+    def buses(self) -> int:
+        """Return the number of buses, each sampled by its own thread."""
+        return len(self._buses)
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of samples overwritten before being drained."""
+        return sum(buffer.dropped for buffer in self.buffers)
+
+    @property
+    def lost(self) -> int:
+        """Return the number of samples skipped, missed or dropped."""
+        return sum(self.skipped) + sum(self.missed) + self.dropped
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread per bus."""
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, args=(indexes,),
+                             name='ina219-bus-sampler-%d' % bus, daemon=True)
+            for bus, indexes in enumerate(self._buses)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the threads to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def drain(self) -> List[Sample]:
+        """Remove and return the samples of all devices, oldest first."""
+        streams = [self.__samples(device, *buffer.drain())
+                   for device, buffer in enumerate(self.buffers)]
+        return list(heapq.merge(*streams))
+
+    @staticmethod
+    def __samples(device: int, timestamps: 'array[float]',
+                  words: 'array[int]') -> Iterator[Sample]:
+        width = RingBuffer.WORDS
+        for index, timestamp in enumerate(timestamps):
+            base = index * width
+            yield Sample(timestamp, device, tuple(words[base:base + width]))
+
+    def _run(self, indexes: List[int]) -> None:
+        try:
+            if self._rate is None:
+                self._run_conversion_ready(indexes)
+            else:
+                self._run_fixed_rate(indexes, 1 / self._rate)
+        except BaseException as e:
+            self.error = e
+            self._stop.set()
+            raise
+
+    def _run_fixed_rate(self, indexes: List[int], period: float) -> None:
+        devices = [(self.buffers[i].append, self.devices[i]._read_raw)
+                   for i in indexes]
+        skipped = self.skipped
+        clock = self._clock
+        buffer = [0] * RingBuffer.WORDS
+        deadline = clock()
+        while not self._stop.is_set():
+            for append, read_raw in devices:
+                append(clock(), read_raw(buffer))
+            deadline += period
+            remaining = deadline - clock()
+            if remaining > 0:
+                self._stop.wait(remaining)
+            elif remaining <= -period:
+                # fell behind, skip the periods already over rather than
+                # catching up with a burst
+                periods = int(-remaining / period)
+                deadline += periods * period
+                for index in indexes:
+                    skipped[index] += periods
+
+    def _run_conversion_ready(self, indexes: List[int]) -> None:
+        devices = [(i, self.buffers[i].append, self.devices[i]._poll_raw,
+                    self.devices[i].conversion_time()) for i in indexes]
+        missed = self.missed
+        last: List[Optional[float]] = [None] * len(self.devices)
+        clock = self._clock
+        poll_interval = min(self.devices[i].poll_interval() for i in indexes)
+        buffer = [0] * RingBuffer.WORDS
+        while not self._stop.is_set():
+            ready = False
+            for index, append, poll_raw, period in devices:
+                timestamp = clock()
+                words = poll_raw(buffer)
+                if words is not None:
+                    append(timestamp, words)
+                    ready = True
+                    # conversions overwritten before being read, as counted
+                    # by ConversionSampler
+                    previous = last[index]
+                    if previous is not None:
+                        missed[index] += max(0, int(
+                            (timestamp - previous) / period + 0.5) - 1)
+                    last[index] = timestamp
+            if not ready:
+                time.sleep(poll_interval)
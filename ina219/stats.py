@@ -0,0 +1,272 @@
+"""Streaming statistics and energy of INA219 measurements.
+
+Statistics are updated incrementally in constant memory, either a
+measurement at a time, e.g. from a ConversionSampler, or a block of samples
+at a time, e.g. drained from a BackgroundSampler or read from a capture
+file. Blocks are reduced with NumPy when it is installed.
+"""
+from math import inf, nan, sqrt
+from typing import Any, Iterable, List, Optional, Sequence
+
+from . import convert
+from .ina219 import Measurement
+
+
+class RunningStatistics:
+    """Running count, minimum, maximum, mean, variance and RMS of values.
+
+    The mean and variance are updated with Welford's algorithm, blocks of
+    values are merged with the parallel variant of Chan et al., so neither
+    loses precision over long streams. All statistics are NaN until a value
+    was added.
+    """
+
+    __slots__ = ('count', '_minimum', '_maximum', '_mean', '_m2')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._minimum = inf
+        self._maximum = -inf
+        self._mean = 0.0
+        self._m2 = 0.0  # sum of squared differences from the mean
+
+    @property
+    def minimum(self) -> float:
+        """Return the smallest value."""
+        return self._minimum if self.count else nan
+
+    @property
+    def maximum(self) -> float:
+        """Return the largest value."""
+        return self._maximum if self.count else nan
+
+    @property
+    def mean(self) -> float:
+        """Return the arithmetic mean of the values."""
+        return self._mean if self.count else nan
+
+    @property
+    def variance(self) -> float:
+        """Return the population variance of the values."""
+        return self._m2 / self.count if self.count else nan
+
+    @property
+    def stdev(self) -> float:
+        """Return the population standard deviation of the values."""
+        return sqrt(self.variance)
+
+    @property
+    def rms(self) -> float:
+        """Return the root mean square of the values."""
+        return sqrt(self.variance + self._mean * self._mean)
+
+    def add(self, value: float) -> None:
+        """Add a value.
+
+        Arguments:
+        value -- the value to add.
+        """
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self._minimum:
+            self._minimum = value
+        if value > self._maximum:
+            self._maximum = value
+
+    def extend(self, values: Sequence[float]) -> None:
+        """Add a block of values.
+
+        Arguments:
+        values -- the values to add, e.g. a NumPy or array.array column.
+        """
+        numpy = convert._numpy()
+        if numpy is None:
+            for value in values:
+                self.add(value)
+            return
+        column = numpy.asarray(values, dtype=numpy.float64)
+        if not len(column):
+            return
+        mean = float(column.mean())
+        self.merge(len(column), float(column.min()), float(column.max()),
+                   mean, float(numpy.square(column - mean).sum()))
+
+    def merge(self, count: int, minimum: float, maximum: float, mean: float,
+              m2: float) -> None:
+        """Merge the statistics of another block of values.
+
+        Arguments:
+        count -- the number of values of the block.
+        minimum -- the smallest value of the block.
+        maximum -- the largest value of the block.
+        mean -- the mean of the block.
+        m2 -- the sum of squared differences from the mean of the block.
+        """
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self._minimum = min(self._minimum, minimum)
+        self._maximum = max(self._maximum, maximum)
+
+
+class MeasurementStatistics:
+    """Running statistics, energy and charge of INA219 measurements.
+
+    Energy and charge are integrated with the trapezoidal rule over the
+    sample timestamps, so irregular sample intervals do not bias them.
+    Samples flagged with current overflow are left out of the current and
+    power statistics and integrated over.
+    """
+
+    def __init__(self) -> None:
+        self.voltage = RunningStatistics()  # bus voltage in volts
+        self.shunt_voltage = RunningStatistics()  # in millivolts
+        self.current = RunningStatistics()  # in milliamps
+        self.power = RunningStatistics()  # in milliwatts
+        self.overflows = 0
+        self.start: Optional[float] = None  # first timestamp
+        self.end: Optional[float] = None  # last timestamp
+        self._energy = 0.0  # milliwatt seconds
+        self._charge = 0.0  # milliamp seconds
+        self._integrated = 0.0  # seconds integrated over
+        self._last: Optional[List[float]] = None  # time, current and power
+
+    @property
+    def duration(self) -> float:
+        """Return the time in seconds from the first to the last sample."""
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    @property
+    def energy_wh(self) -> float:
+        """Return the energy in watt hours."""
+        return self._energy / 3600 / 1000
+
+    @property
+    def charge_mah(self) -> float:
+        """Return the charge in milliamp hours."""
+        return self._charge / 3600
+
+    @property
+    def average_power(self) -> float:
+        """Return the time weighted average power in milliwatts."""
+        if not self._integrated:
+            return self.power.mean
+        return self._energy / self._integrated
+
+    def add(self, measurement: Measurement) -> None:
+        """Add a measurement, e.g. as returned by INA219.read_all().
+
+        Arguments:
+        measurement -- the measurement to add.
+        """
+        timestamp = measurement.timestamp
+        if self.start is None:
+            self.start = timestamp
+        self.end = timestamp
+        self.voltage.add(measurement.voltage)
+        self.shunt_voltage.add(measurement.shunt_voltage)
+        self.current.add(measurement.current)
+        self.power.add(measurement.power)
+        self.__integrate(timestamp, measurement.current, measurement.power)
+
+    def extend(self, measurements: Iterable[Measurement]) -> None:
+        """Add measurements, e.g. from a ConversionSampler.
+
+        Arguments:
+        measurements -- the measurements to add, may be endless.
+        """
+        for measurement in measurements:
+            self.add(measurement)
+
+    def add_columns(self, timestamps: Sequence[float],
+                    converted: convert.Converted) -> None:
+        """Add a block of converted samples.
+
+        Arguments:
+        timestamps -- the time of each sample in seconds.
+        converted -- the converted samples, see ina219.convert.
+        """
+        if not len(timestamps):
+            return
+        if self.start is None:
+            self.start = timestamps[0]
+        self.end = timestamps[-1]
+        self.voltage.extend(converted.voltage)
+        self.shunt_voltage.extend(converted.shunt_voltage)
+
+        numpy = convert._numpy()
+        current = converted.current
+        power = converted.power
+        if numpy is not None:
+            timestamps = numpy.asarray(timestamps, dtype=numpy.float64)
+            valid = ~numpy.asarray(converted.overflow, dtype=bool)
+            if not valid.all():
+                self.overflows += int(len(valid) - valid.sum())
+                timestamps = timestamps[valid]
+                current = numpy.asarray(current)[valid]
+                power = numpy.asarray(power)[valid]
+        else:
+            overflow = converted.overflow
+            if any(overflow):
+                self.overflows += sum(1 for o in overflow if o)
+                timestamps = [t for t, o in zip(timestamps, overflow)
+                              if not o]
+                current = [c for c, o in zip(current, overflow) if not o]
+                power = [p for p, o in zip(power, overflow) if not o]
+        if not len(timestamps):
+            return
+        self.current.extend(current)
+        self.power.extend(power)
+
+        if numpy is None:
+            for sample in zip(timestamps, current, power):
+                self.__integrate(*sample)
+            return
+        if self._last is not None:
+            self.__integrate(timestamps[0], current[0], power[0])
+        self._charge += _trapezoid(numpy, timestamps, current)
+        self._energy += _trapezoid(numpy, timestamps, power)
+        self._integrated += float(timestamps[-1] - timestamps[0])
+        self._last = [float(timestamps[-1]), float(current[-1]),
+                      float(power[-1])]
+
+    def add_words(self, timestamps: Sequence[float], words: Sequence[int],
+                  current_lsb: float, power_lsb: float) -> None:
+        """Add a block of raw samples, e.g. drained from a BackgroundSampler.
+
+        Arguments:
+        timestamps -- the time of each sample in seconds.
+        words -- unsigned bus voltage, shunt voltage, current and power
+            register words, convert.WORDS per sample.
+        current_lsb -- the current LSB in amps per bit, see INA219.current_lsb.
+        power_lsb -- the power LSB in watts per bit, see INA219.power_lsb.
+        """
+        self.add_columns(timestamps,
+                         convert.convert(words, current_lsb, power_lsb))
+
+    def __integrate(self, timestamp: float, current: float,
+                    power: float) -> None:
+        last = self._last
+        if last is None:
+            self._last = [timestamp, current, power]
+            return
+        interval = timestamp - last[0]
+        self._integrated += interval
+        self._charge += (last[1] + current) * interval / 2
+        self._energy += (last[2] + power) * interval / 2
+        last[0] = timestamp
+        last[1] = current
+        last[2] = power
+
+
+def _trapezoid(numpy: Any, x: Any, y: Any) -> float:
+    y = numpy.asarray(y, dtype=numpy.float64)
+    return float(((y[1:] + y[:-1]) * numpy.diff(x)).sum() / 2)
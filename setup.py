@@ -39,5 +39,8 @@ setup(name='pi-ina219',
           'Adafruit': ['Adafruit-PureIO'],
       },
       packages=['ina219'],
+      entry_points={
+          'console_scripts': ['ina219=ina219.cli:main'],
+      },
       test_suite='tests',
       )
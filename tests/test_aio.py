@@ -0,0 +1,131 @@
+import sys
+import asyncio
+import logging
+import threading
+import unittest
+import weakref
+
+from mock import Mock, patch
+
+from ina219 import aio, drivers, INA219, I2cDriver
+from ina219.aio import AsyncINA219, bus_executor
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestAsyncINA219(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.aina = AsyncINA219(self.ina)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_executor_per_bus(self):
+        other = AsyncINA219(INA219(0.1, i2c_driver=self.i2c, address=0x41))
+        self.assertIs(self.aina._executor, other._executor)
+        self.assertIsNot(self.aina._executor, bus_executor(Mock()))
+
+    def test_executor_shared_by_bus_drivers(self):
+        executor = bus_executor(drivers.SimulatedINA219Driver.load(7))
+        self.assertIs(bus_executor(drivers.SimulatedINA219Driver.load(7)),
+                      executor)
+        self.assertIsNot(bus_executor(drivers.SimulatedINA219Driver.load(8)),
+                         executor)
+
+    def test_executor_shared_with_instrumentation(self):
+        self.ina.enable_metrics()
+        self.assertIs(AsyncINA219(self.ina)._executor, self.aina._executor)
+
+    @patch('ina219.aio._executors', weakref.WeakKeyDictionary())
+    def test_shutdown_at_exit(self):
+        executor = bus_executor(self.i2c)
+        aio._shutdown_executors()
+        with self.assertRaises(RuntimeError):
+            executor.submit(int)
+
+    def test_voltage_in_bus_thread(self):
+        threads = []
+
+        def read_word(address, register, signed):
+            threads.append(threading.current_thread())
+            return 0xfa0
+
+        self.i2c.read_word = Mock(side_effect=read_word)
+        self.assertEqual(self.run_async(self.aina.voltage()), 2.0)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    @patch('time.sleep')
+    def test_wake_does_not_block(self, sleep):
+        self.i2c.read_word = Mock(return_value=0x08)
+        self.run_async(self.aina.wake())
+        self.i2c.write.assert_called_with(0x40, 0x00, bytes([0x00, 0xf]))
+        sleep.assert_not_called()
+
+    def test_stream_conversion_ready(self):
+        self.run_async(self.aina.configure(
+            INA219.RANGE_16V, INA219.GAIN_1_40MV,
+            INA219.ADC_9BIT, INA219.ADC_9BIT))
+        self.i2c.read_word = Mock(side_effect=[0xfa0, 0xfa2, 0xfa0, 0x1f42])
+        self.i2c.read_words = Mock(return_value=[0, 0, 0])
+
+        async def take(count):
+            samples = []
+            async for sample in self.aina.stream():
+                samples.append(sample)
+                if len(samples) == count:
+                    return samples
+
+        samples = self.run_async(take(2))
+        self.assertEqual([s.voltage for s in samples], [2.0, 4.0])
+
+    def test_stream_timeout(self):
+        self.run_async(self.aina.configure(
+            INA219.RANGE_16V, INA219.GAIN_1_40MV,
+            INA219.ADC_9BIT, INA219.ADC_9BIT))
+        self.i2c.read_word = Mock(return_value=0xfa0)
+
+        async def take():
+            async for sample in self.aina.stream(timeout=0.005):
+                pass
+
+        with self.assertRaises(TimeoutError):
+            self.run_async(take())
+
+    def test_stream_interval(self):
+        self.run_async(self.aina.configure(
+            INA219.RANGE_16V, INA219.GAIN_1_40MV))
+        self.i2c.read_words = Mock(return_value=[0xfa0, 0, 0, 0])
+
+        async def take(count):
+            samples = []
+            async for sample in self.aina.stream(interval=0.001):
+                samples.append(sample)
+                if len(samples) == count:
+                    return samples
+
+        samples = self.run_async(take(3))
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(self.i2c.read_words.call_count, 3)
+
+    def test_concurrent_devices(self):
+        other_i2c = Mock()
+        other = AsyncINA219(INA219(0.1, 0.4, i2c_driver=other_i2c))
+        self.i2c.read_word = Mock(return_value=0xfa0)
+        other_i2c.read_word = Mock(return_value=0x1f40)
+
+        async def read_both():
+            return await asyncio.gather(self.aina.voltage(), other.voltage())
+
+        self.assertEqual(self.run_async(read_both()), [2.0, 4.0])
@@ -0,0 +1,94 @@
+import itertools
+import sys
+import logging
+import threading
+import unittest
+
+from mock import Mock
+
+from ina219 import bus_lock, drivers, INA219, I2cDriver
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class ContendedDriver(drivers.SimulatedINA219Driver):
+    """Simulated driver checking that no other thread holds the bus."""
+
+    def __init__(self):
+        super().__init__()
+        self.contended = []
+
+    def read_word(self, address, register, signed=False):
+        lock = bus_lock(self)
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(lock.acquire(timeout=0.001)))
+        thread.start()
+        thread.join()
+        if acquired[0]:
+            lock.release()
+        self.contended.append(acquired[0])
+        return super().read_word(address, register, signed)
+
+
+class TestBusLock(unittest.TestCase):
+
+    def test_lock_per_driver(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        driver = Mock()
+        self.assertIs(bus_lock(driver), bus_lock(driver))
+        self.assertIsNot(bus_lock(driver), bus_lock(Mock()))
+
+    def test_lock_per_interface(self):
+        self.assertIs(bus_lock(drivers.SimulatedINA219Driver.load(1)),
+                      bus_lock(drivers.SimulatedINA219Driver.load(1)))
+        self.assertIsNot(bus_lock(drivers.SimulatedINA219Driver.load(1)),
+                         bus_lock(drivers.SimulatedINA219Driver.load(2)))
+
+    def test_instrumented_driver_shares_lock(self):
+        driver = drivers.SimulatedINA219Driver()
+        ina = INA219(0.1, 0.4, i2c_driver=driver)
+        ina.enable_metrics()
+        self.assertIs(bus_lock(ina._i2c), bus_lock(driver))
+
+    def test_lock_held_across_current(self):
+        driver = ContendedDriver()
+        ina = INA219(0.1, 0.4, i2c_driver=driver)
+        ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+        ina.current()
+        # overflow check and current read
+        self.assertEqual(driver.contended, [False, False])
+
+    def test_threads_sharing_bus(self):
+        # every clock reading advances the simulated time by 10ms, so a
+        # conversion completes between any two transactions
+        ticks = itertools.count()
+        driver = drivers.SimulatedINA219Driver(
+            addresses=[0x40, 0x41], clock=lambda: next(ticks) * 0.01)
+        driver.set_load(5.0, 0.1, address=0x40)
+        driver.set_load(5.0, 1.0, address=0x41)
+        devices = [INA219(0.1, 0.4, address=a, i2c_driver=driver)
+                   for a in (0x40, 0x41)]
+        for ina in devices:
+            ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+        errors = []
+
+        def sample(ina, expected):
+            try:
+                for _ in range(200):
+                    self.assertAlmostEqual(ina.current(), expected,
+                                           delta=expected / 100)
+                    ina.configure(ina.RANGE_16V, ina.GAIN_AUTO)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=sample, args=args)
+                   for args in ((devices[0], 100.0), (devices[1], 1000.0))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
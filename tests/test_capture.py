@@ -0,0 +1,71 @@
+import os
+import sys
+import logging
+import tempfile
+import unittest
+from array import array
+
+from mock import Mock, patch
+
+from ina219 import INA219, I2cDriver
+from ina219.capture import CaptureReader, CaptureWriter
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestCapture(unittest.TestCase):
+
+    WORDS = [0x2592, 0x07d0, 0x0001, 0x1ea9, 0x0fa1, 0xf060, 0xb2ae, 0x0000]
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.ina = INA219(0.1, 0.4, i2c_driver=Mock())
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           self.ina.ADC_12BIT, self.ina.ADC_4SAMP)
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'capture.bin')
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.remove, self.path)
+
+    def write(self):
+        with CaptureWriter(self.path, self.ina) as writer:
+            writer.write(1.0, self.WORDS[:4])
+            writer.write_many(array('d', [2.0, 3.0]),
+                              array('H', self.WORDS[4:] + self.WORDS[:4]))
+        self.assertEqual(writer.records, 3)
+
+    def assert_read(self):
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(reader.calibration, 0x8333)
+            self.assertEqual(reader.gain, self.ina.GAIN_1_40MV)
+            self.assertEqual(reader.voltage_range, self.ina.RANGE_16V)
+            self.assertEqual(reader.shunt_adc, self.ina.ADC_4SAMP)
+            self.assertEqual(reader.shunt_ohms, 0.1)
+            self.assertEqual(reader.current_lsb, self.ina.current_lsb)
+            self.assertEqual(list(reader.timestamp), [1.0, 2.0, 3.0])
+            self.assertEqual(list(reader.bus), [0x2592, 0x0fa1, 0x2592])
+            self.assertEqual(list(reader.power), [0x1ea9, 0, 0x1ea9])
+            converted = reader.converted(1)
+            self.assertEqual(list(converted.voltage), [2.0, 4.808])
+            self.assertEqual(list(converted.shunt_voltage), [-40.0, 20.0])
+            self.assertAlmostEqual(converted.current[0], -241.4, 1)
+            del converted
+
+    def test_write_read(self):
+        self.write()
+        self.assert_read()
+
+    @patch('ina219.convert._numpy', return_value=None)
+    def test_write_read_without_numpy(self, numpy):
+        self.write()
+        self.assert_read()
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'\0' * 64)
+        with self.assertRaisesRegex(ValueError, 'not a version 1'):
+            CaptureReader(self.path)
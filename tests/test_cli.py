@@ -0,0 +1,104 @@
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import logging
+import tempfile
+import unittest
+
+from ina219 import cli
+from ina219.capture import CaptureReader
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestCli(unittest.TestCase):
+
+    def run_cli(self, *argv):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            status = cli.main(['--driver', 'simulated', '--interval', '0.01']
+                              + list(argv))
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_csv(self):
+        status, stdout, stderr = self.run_cli(
+            '--address', '0x40', '0x41', '--rate', '200', '--count', '3')
+        self.assertEqual(status, 0)
+        lines = stdout.splitlines()
+        self.assertEqual(lines[0], ','.join(cli.FIELDS))
+        self.assertEqual(len(lines), 7)
+        rows = [line.split(',') for line in lines[1:]]
+        self.assertEqual(sorted(row[2] for row in rows), ['0x40'] * 3 +
+                         ['0x41'] * 3)
+        times = [float(row[0]) for row in rows]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(rows[0][3], '5.000')
+        self.assertAlmostEqual(float(rows[0][5]), 100.0, delta=0.1)
+        self.assertIn('6 samples of 2 devices', stderr)
+        self.assertRegex(stderr, r'\d+ dropped \(\d+ periods skipped, 0 '
+                                 r'conversions missed, 0 overwritten\)')
+        self.assertRegex(stderr, r'1:0x41 3 samples, \d+ dropped')
+
+    def test_jsonl_buses(self):
+        status, stdout, _ = self.run_cli(
+            '--address', '0x40', '2:0x40', '--format', 'jsonl', '--count', '2',
+            '--range', '16', '--gain', '40mv', '--bus-adc', '9bit',
+            '--quiet')
+        self.assertEqual(status, 0)
+        samples = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(sorted(s['bus'] for s in samples), [1, 1, 2, 2])
+        self.assertEqual(samples[0]['voltage'], 5.0)
+        self.assertFalse(samples[0]['overflow'])
+
+    def test_binary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.bin')
+            status, stdout, _ = self.run_cli(
+                '--address', '0x40', '0x44', '--format', 'binary',
+                '--output', path, '--count', '4', '--quiet')
+            self.assertEqual(status, 0)
+            self.assertEqual(stdout, '')
+            for name in ('trace-1-0x40.bin', 'trace-1-0x44.bin'):
+                with CaptureReader(os.path.join(directory, name)) as reader:
+                    self.assertEqual(len(reader), 4)
+                    converted = reader.converted()
+                    self.assertAlmostEqual(converted.voltage[0], 5.0)
+                    del converted
+
+    def test_duration(self):
+        status, stdout, stderr = self.run_cli('--duration', '0.05')
+        self.assertEqual(status, 0)
+        self.assertGreater(len(stdout.splitlines()), 2)
+        self.assertIn('samples/s per device', stderr)
+        self.assertIn('0 periods skipped', stderr)
+
+    def test_dropped(self):
+        # far more samples than can be taken
+        status, _, stderr = self.run_cli('--rate', '1000000', '--duration',
+                                         '0.05')
+        self.assertEqual(status, 0)
+        skipped = int(re.search(r'(\d+) periods skipped', stderr).group(1))
+        self.assertGreater(skipped, 0)
+
+    def test_errors(self):
+        for argv in (['--format', 'binary'],
+                     ['--address', '0x4x'],
+                     ['--address', '0x40', '1:0x40'],
+                     ['--gain', '10mv']):
+            with self.subTest(argv=argv):
+                with self.assertRaises(SystemExit) as context:
+                    self.run_cli(*argv)
+                self.assertEqual(context.exception.code, 2)
+
+    def test_device_error(self):
+        with self.assertRaises(SystemExit) as context:
+            self.run_cli('--driver', 'i2c-dev', '--bus', '99')
+        self.assertEqual(context.exception.code, 1)
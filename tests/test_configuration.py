@@ -162,6 +162,82 @@ class TestConfiguration(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "Expected current"):
             ina.configure(self.ina.RANGE_32V, ina.GAIN_1_40MV)
 
+    def test_calibration_table(self):
+        self.assertEqual(self.ina.calibration_table, ())
+        self.ina.configure(self.ina.RANGE_32V, self.ina.GAIN_AUTO)
+        table = self.ina.calibration_table
+        self.assertEqual(len(table), 8)
+        self.assertEqual([(c.voltage_range, c.gain) for c in table[:5]],
+                         [(0, 0), (0, 1), (0, 2), (0, 3), (1, 0)])
+        # the configured gain is calibrated for the expected current
+        self.assertEqual([c.calibration for c in table[4:]],
+                         [0x8333, 0x8333, 0x20cc, 0x1066])
+        self.assertEqual(table[1].max_power * 2, table[5].max_power)
+        self.assertAlmostEqual(table[5].max_current, 0.4, 3)
+        self.assertEqual(self.ina.calibration, 0x8333)
+
+    def test_calibration_table_reused(self):
+        self.ina.configure(self.ina.RANGE_32V, self.ina.GAIN_AUTO)
+        table = self.ina.calibration_table
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO,
+                           self.ina.ADC_9BIT, self.ina.ADC_9BIT)
+        self.assertIs(self.ina.calibration_table, table)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_4_160MV)
+        self.assertIsNot(self.ina.calibration_table, table)
+
+    def test_restore(self):
+        self.ina.configure(self.ina.RANGE_32V, self.ina.GAIN_2_80MV)
+        self.ina.reset()
+        self.i2c.reset_mock()
+        self.ina.restore()
+        self.assertEqual(self.i2c.write.call_args_list,
+                         [call(0x40, 0x05, bytes([0x83, 0x33])),
+                          call(0x40, 0x00, bytes([0x29, 0x9f]))])
+        self.i2c.read_word.assert_not_called()
+
+    def test_adc_noise(self):
+        self.assertEqual(INA219.adc_noise(INA219.ADC_9BIT), 8.0)
+        self.assertEqual(INA219.adc_noise(INA219.ADC_12BIT), 1.0)
+        self.assertEqual(INA219.adc_noise(8), 1.0)
+        self.assertEqual(INA219.adc_noise(INA219.ADC_4SAMP), 0.5)
+        self.assertEqual(INA219.adc_noise(INA219.ADC_64SAMP), 0.125)
+
+    def test_plan_adc(self):
+        plan = INA219.plan_adc(1000)
+        # two 12-bit conversions take 1.064ms, longer than the period
+        self.assertEqual((plan.bus_adc, plan.shunt_adc),
+                         (INA219.ADC_11BIT, INA219.ADC_12BIT))
+        self.assertAlmostEqual(plan.conversion_time, 808e-6)
+        plan = INA219.plan_adc(100)
+        self.assertEqual((plan.bus_adc, plan.shunt_adc),
+                         (INA219.ADC_8SAMP, INA219.ADC_8SAMP))
+        plan = INA219.plan_adc(1)
+        self.assertEqual((plan.bus_adc, plan.shunt_adc),
+                         (INA219.ADC_128SAMP, INA219.ADC_128SAMP))
+
+    def test_plan_adc_shunt_only(self):
+        # the whole period is spent on the shunt voltage
+        plan = INA219.plan_adc(900, mode=INA219.MODE_SHUNT_CONTINUOUS)
+        self.assertEqual((plan.bus_adc, plan.shunt_adc),
+                         (INA219.ADC_12BIT, INA219.ADC_2SAMP))
+        self.assertAlmostEqual(plan.conversion_time, 1.06e-3)
+        plan = INA219.plan_adc(5000, mode=INA219.MODE_SHUNT_TRIGGERED)
+        self.assertEqual(plan.shunt_adc, INA219.ADC_10BIT)
+
+    def test_plan_adc_impossible(self):
+        with self.assertRaisesRegex(ValueError, "No ADC settings"):
+            INA219.plan_adc(10000)
+        with self.assertRaisesRegex(ValueError, "No ADC settings"):
+            INA219.plan_adc(1000, max_noise=1.0)
+
+    def test_configure_for_rate(self):
+        plan = self.ina.configure_for_rate(500, voltage_range=INA219.RANGE_32V,
+                                           gain=INA219.GAIN_1_40MV)
+        self.assertEqual((plan.bus_adc, plan.shunt_adc),
+                         (INA219.ADC_12BIT, INA219.ADC_2SAMP))
+        self.assertLessEqual(self.ina.conversion_time(), 1 / 500)
+        self.i2c.write.assert_called_with(0x40, 0x00, bytes([0x21, 0xcf]))
+
     def test_sleep(self):
         self.i2c.read_word = Mock(return_value=0x0F)
         self.ina.sleep()
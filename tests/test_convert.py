@@ -0,0 +1,72 @@
+import sys
+import logging
+import unittest
+from array import array
+
+from mock import Mock
+
+from ina219 import INA219, I2cDriver
+from ina219 import convert
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestConvert(unittest.TestCase):
+
+    WORDS = array('H', [0x2592, 0x07d0, 0x0001, 0x1ea9,
+                        0x0fa1, 0xf060, 0xb2ae, 0x0000])
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.ina = INA219(0.1, 0.4, i2c_driver=Mock())
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+
+    def assert_converted(self, converted):
+        self.assertEqual(list(converted.voltage), [4.808, 2.0])
+        self.assertEqual(list(converted.shunt_voltage), [20.0, -40.0])
+        self.assertAlmostEqual(converted.current[0], 0.012, 3)
+        self.assertAlmostEqual(converted.current[1], -241.4, 1)
+        self.assertAlmostEqual(converted.power[0], 1914.0, 0)
+        self.assertEqual(converted.power[1], 0)
+        self.assertEqual([bool(o) for o in converted.overflow],
+                         [False, True])
+
+    def test_convert_array(self):
+        converted = convert.convert(
+            self.WORDS, self.ina.current_lsb, self.ina.power_lsb,
+            use_numpy=False)
+        self.assertIsInstance(converted.voltage, array)
+        self.assert_converted(converted)
+
+    def test_convert_list(self):
+        self.assert_converted(convert.convert(
+            list(self.WORDS), self.ina.current_lsb, self.ina.power_lsb,
+            use_numpy=False))
+
+    def test_convert_columns(self):
+        words = list(self.WORDS)
+        self.assert_converted(convert.convert_columns(
+            words[0::4], words[1::4], words[2::4], words[3::4],
+            self.ina.current_lsb, self.ina.power_lsb, use_numpy=False))
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_convert_numpy(self):
+        converted = convert.convert(
+            self.WORDS, self.ina.current_lsb, self.ina.power_lsb)
+        self.assertIsInstance(converted.voltage, numpy.ndarray)
+        self.assert_converted(converted)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_convert_columns_numpy(self):
+        words = numpy.frombuffer(self.WORDS, dtype=numpy.uint16)
+        self.assert_converted(convert.convert_columns(
+            words[0::4], words[1::4], words[2::4], words[3::4],
+            self.ina.current_lsb, self.ina.power_lsb, use_numpy=True))
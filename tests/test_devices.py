@@ -0,0 +1,86 @@
+import sys
+import logging
+import unittest
+
+from mock import Mock, call, patch
+
+from ina219 import drivers, INA219, I2cDriver
+from ina219.devices import INA219Array
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestINA219Array(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.buses = {}
+        self.factory = Mock(
+            side_effect=lambda bus: self.buses.setdefault(bus, Mock()))
+        self.array = INA219Array(driver_factory=self.factory)
+        self.ina_1 = self.array.add(0.1, 0.4, address=0x40, interface=1)
+        self.ina_2 = self.array.add(0.1, 0.4, address=0x41, interface=1)
+        self.ina_3 = self.array.add(0.1, 0.4, address=0x40, interface=3)
+
+    def test_driver_shared_per_bus(self):
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertIs(self.ina_1._i2c, self.buses[1])
+        self.assertIs(self.ina_2._i2c, self.buses[1])
+        self.assertIs(self.ina_3._i2c, self.buses[3])
+        self.assertEqual(self.array.devices,
+                         [self.ina_1, self.ina_2, self.ina_3])
+
+    def test_configure(self):
+        self.array.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV)
+        self.buses[1].write.assert_has_calls(
+            [call(0x40, 0x00, bytes([0x01, 0x9f])),
+             call(0x41, 0x00, bytes([0x01, 0x9f]))], any_order=True)
+        self.buses[3].write.assert_called_with(
+            0x40, 0x00, bytes([0x01, 0x9f]))
+
+    def test_read_all_no_wait(self):
+        self.array.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV)
+        for bus in self.buses.values():
+            bus.read_words = Mock(return_value=[0xfa0, 0, 0, 0])
+        measurements = self.array.read_all(wait=False)
+        self.assertEqual([m.voltage for m in measurements], [2.0] * 3)
+
+    @patch('time.sleep')
+    def test_read_all_interleaved(self, sleep):
+        self.array.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV)
+        ready = {(1, 0x40): [0xfa2],
+                 (1, 0x41): [0xfa0, 0xfa0, 0x1f42],
+                 (3, 0x40): [0xfa0, 0x3e82]}
+        for interface, bus in self.buses.items():
+            bus.read_word = Mock(
+                side_effect=lambda address, register, signed, i=interface:
+                ready[(i, address)].pop(0))
+            bus.read_words = Mock(return_value=[0, 0, 0])
+        measurements = self.array.read_all()
+        self.assertEqual([m.voltage for m in measurements], [2.0, 4.0, 8.0])
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(self.buses[1].read_words.call_count, 2)
+        self.assertEqual(self.buses[3].read_words.call_count, 1)
+
+    def test_read_all_timeout(self):
+        driver = drivers.SimulatedINA219Driver(addresses=[0x40, 0x41])
+        array = INA219Array(driver_factory=lambda bus: driver)
+        array.add(0.1, 0.4, address=0x40)
+        asleep = array.add(0.1, 0.4, address=0x41)
+        array.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV,
+                        INA219.ADC_9BIT, INA219.ADC_9BIT)
+        self.assertEqual(len(array.read_all()), 2)
+        asleep.sleep()
+        with self.assertRaisesRegex(TimeoutError, '0x41 within 0.020s'):
+            array.read_all(timeout=0.02)
+        # powered down, the other device polls at the minimum interval
+        array.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV, mode=0)
+        with patch('time.sleep') as sleep:
+            with self.assertRaises(TimeoutError):
+                array.read_all(timeout=0.001)
+        sleep.assert_called_with(INA219.POLL_INTERVAL_MIN)
+        with self.assertRaises(TimeoutError):
+            array.read_all()
@@ -1,10 +1,12 @@
+import os
 import sys
 import logging
+import tempfile
 import unittest
 
 from mock import Mock, patch
 
-from ina219 import drivers
+from ina219 import drivers, INA219, DeviceRangeError
 
 
 logger = logging.getLogger()
@@ -19,6 +21,7 @@ class TestDrivers(unittest.TestCase):
         sys.modules['smbus2'] = Mock()
         sys.modules['Adafruit_PureIO'] = Mock()
         sys.modules['Adafruit_PureIO.smbus'] = Mock()
+        drivers._auto_drivers.clear()
 
     def tearDown(self) -> None:
         if 'smbus' in sys.modules:
@@ -51,6 +54,10 @@ class TestDrivers(unittest.TestCase):
         read_signed = driver.read_word(0xBA, 0xDC, signed=True)
         self.assertEqual(read_signed, -21555)
 
+        instance.read_i2c_block_data.return_value = [0xAB, 0xCD]
+        read_words = driver.read_words(0xBA, [0x01, 0x02])
+        self.assertEqual(read_words, [0xABCD, 0xABCD])
+
     @patch('smbus2.SMBus')
     def test_smbus2_driver(self, smbus):
 
@@ -109,3 +116,270 @@ class TestDrivers(unittest.TestCase):
         exp_exc_msg = 'No compatible I2C module found'
         with self.assertRaisesRegex(ModuleNotFoundError, exp_exc_msg):
             driver = drivers.auto(interface=321)
+
+    def test_auto_driver_remembered(self):
+        smbus2 = sys.modules.pop('smbus2')
+        driver = drivers.auto(interface=321)
+        self.assertEqual(driver.__class__, drivers.SmbusDriver)
+        # smbus2 is not tried again
+        sys.modules['smbus2'] = smbus2
+        driver = drivers.auto(interface=321)
+        self.assertEqual(driver.__class__, drivers.SmbusDriver)
+        driver = drivers.auto(interface=322)
+        self.assertEqual(driver.__class__, drivers.Smbus2Driver)
+
+    def test_auto_driver_cache_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'drivers')
+            with patch.dict(os.environ, {drivers.DRIVER_CACHE_ENV: path}):
+                del sys.modules['smbus2']
+                drivers.auto(interface=321)
+                drivers.auto(interface=322)
+                with open(path) as file:
+                    self.assertEqual(file.read(), '321 SmbusDriver\n'
+                                                  '322 SmbusDriver\n')
+
+                # a new process reads the cache
+                drivers._auto_drivers.clear()
+                with open(path, 'w') as file:
+                    file.write('321 AdafruitDriver\n')
+                driver = drivers.auto(interface=321)
+                self.assertEqual(driver.__class__, drivers.AdafruitDriver)
+
+                # a stale cache entry is replaced
+                drivers._auto_drivers.clear()
+                del sys.modules['Adafruit_PureIO.smbus']
+                driver = drivers.auto(interface=321)
+                self.assertEqual(driver.__class__, drivers.SmbusDriver)
+                with open(path) as file:
+                    self.assertEqual(file.read(), '321 SmbusDriver\n')
+
+
+class TestI2cDevDriver(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.transactions = []
+        self.device = {0x01: [0xF0, 0x60], 0x02: [0xAB, 0xCD],
+                       0x03: [0x12, 0x34]}
+
+    def ioctl(self, fd, request, data):
+        self.assertEqual(fd, 7)
+        self.assertEqual(request, drivers.I2C_RDWR)
+        msgs = [data.msgs[i] for i in range(data.nmsgs)]
+        for write, read in zip(msgs[::2], msgs[1::2]):
+            for i, b in enumerate(self.device[write.buf[0]]):
+                read.buf[i] = b
+        self.transactions.append(
+            [(m.addr, m.flags, bytes(m.buf[:m.len])) for m in msgs])
+        return 0
+
+    @patch('os.open', return_value=7)
+    def load(self, os_open):
+        driver = drivers.I2cDevDriver.load(interface=3)
+        os_open.assert_called_with('/dev/i2c-3', os.O_RDWR)
+        return driver
+
+    @patch('fcntl.ioctl')
+    def test_read_word(self, ioctl):
+        ioctl.side_effect = self.ioctl
+        driver = self.load()
+        self.assertEqual(driver.read_word(0x41, 0x02), 0xABCD)
+        self.assertEqual(driver.read_word(0x41, 0x02, signed=True), -21555)
+        self.assertEqual(
+            self.transactions[0],
+            [(0x41, 0, b'\x02'), (0x41, drivers.I2C_M_RD, b'\xab\xcd')])
+
+    @patch('fcntl.ioctl')
+    def test_read_words(self, ioctl):
+        ioctl.side_effect = self.ioctl
+        driver = self.load()
+        for _ in range(2):
+            self.assertEqual(driver.read_words(0x41, [0x02, 0x01, 0x03]),
+                             [0xABCD, 0xF060, 0x1234])
+        self.assertEqual(len(self.transactions), 2)
+        self.assertEqual(
+            self.transactions[0],
+            [(0x41, 0, b'\x02'), (0x41, drivers.I2C_M_RD, b'\xab\xcd'),
+             (0x41, 0, b'\x01'), (0x41, drivers.I2C_M_RD, b'\xf0\x60'),
+             (0x41, 0, b'\x03'), (0x41, drivers.I2C_M_RD, b'\x12\x34')])
+
+    @patch('fcntl.ioctl')
+    def test_read_words_into(self, ioctl):
+        ioctl.side_effect = self.ioctl
+        driver = self.load()
+        values = [0] * 4
+        driver.read_words_into(0x41, (0x02, 0x01, 0x03), values)
+        self.assertEqual(values, [0xABCD, 0xF060, 0x1234, 0])
+        driver.read_words(0x41, (0x02, 0x01, 0x03))
+        self.assertEqual(len(self.transactions), 2)
+        self.assertEqual(self.transactions[0], self.transactions[1])
+
+    @patch('fcntl.ioctl')
+    def test_write(self, ioctl):
+        ioctl.side_effect = self.ioctl
+        driver = self.load()
+        driver.write(0x40, 0x05, b'\x83\x33')
+        self.assertEqual(self.transactions, [[(0x40, 0, b'\x05\x83\x33')]])
+
+    @patch('os.close')
+    def test_close(self, os_close):
+        self.load().close()
+        os_close.assert_called_with(7)
+
+    @patch('os.access', return_value=True)
+    @patch('os.open', return_value=7)
+    def test_auto_prefers_i2c_dev(self, os_open, os_access):
+        driver = drivers.auto(interface=1)
+        self.assertEqual(driver.__class__, drivers.I2cDevDriver)
+        os_access.assert_called_with('/dev/i2c-1', os.R_OK | os.W_OK)
+
+
+class TestSimulatedINA219Driver(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.driver = drivers.SimulatedINA219Driver(
+            addresses=[0x40, 0x41], clock=lambda: self.now)
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.driver)
+        self.ina.configure(INA219.RANGE_16V, INA219.GAIN_AUTO,
+                           INA219.ADC_12BIT, INA219.ADC_12BIT)
+
+    def convert(self):
+        self.now += self.ina.conversion_time()
+
+    def test_read_all(self):
+        self.convert()
+        measurement = self.ina.read_all()
+        self.assertAlmostEqual(measurement.voltage, 5.0)
+        self.assertAlmostEqual(measurement.shunt_voltage, 10.0)
+        self.assertAlmostEqual(measurement.current, 100.0, 1)
+        self.assertAlmostEqual(measurement.power, 500.0, 0)
+
+    def test_conversion_ready(self):
+        self.assertFalse(self.ina.is_conversion_ready())
+        self.convert()
+        self.assertTrue(self.ina.is_conversion_ready())
+        self.ina.power()
+        self.assertFalse(self.ina.is_conversion_ready())
+        self.convert()
+        self.assertTrue(self.ina.is_conversion_ready())
+
+    def test_overflow_auto_gain(self):
+        self.driver.set_load(12.0, 1.0)
+        self.convert()
+        self.assertTrue(self.ina.current_overflow())
+        # conversions complete while the auto gain logic sleeps
+        with patch('time.sleep', side_effect=lambda s: self.convert()):
+            self.assertAlmostEqual(self.ina.current(), 1000.0, 0)
+        # the saturated shunt voltage only fits into the largest range
+        self.assertEqual(self.ina._gain, INA219.GAIN_8_320MV)
+
+    def test_auto_gain_step_down(self):
+        self.ina.configure_auto_gain(step_down_samples=4)
+        self.driver.set_load(12.0, 1.0)
+        self.convert()
+        with patch('time.sleep', side_effect=lambda s: self.convert()):
+            for _ in range(3):
+                self.assertAlmostEqual(self.ina.current(), 1000.0, 0)
+                self.assertEqual(self.ina._gain, INA219.GAIN_8_320MV)
+                self.convert()
+            # 100mV fits into the 160mV range with 20% headroom
+            self.assertAlmostEqual(self.ina.current(), 1000.0, 0)
+            self.assertEqual(self.ina._gain, INA219.GAIN_4_160MV)
+            self.driver.set_load(12.0, 0.01)
+            self.convert()
+            for _ in range(4):
+                self.ina.read_all()
+                self.convert()
+        # a single step straight down to the smallest range
+        self.assertEqual(self.ina._gain, INA219.GAIN_1_40MV)
+        self.assertAlmostEqual(self.ina.read_all().current, 10.0, 1)
+
+    def test_shunt_only(self):
+        self.ina.configure(INA219.RANGE_16V, INA219.GAIN_AUTO,
+                           INA219.ADC_12BIT, INA219.ADC_12BIT,
+                           INA219.MODE_SHUNT_CONTINUOUS)
+        self.now += 532e-6
+        self.assertTrue(self.ina.is_conversion_ready())
+        transactions = self.driver.transactions
+        self.assertAlmostEqual(self.ina.current(), 100.0, 1)
+        self.assertEqual(self.driver.transactions, transactions + 1)
+
+    def test_shunt_only_auto_gain(self):
+        self.ina.configure(INA219.RANGE_16V, INA219.GAIN_AUTO,
+                           INA219.ADC_12BIT, INA219.ADC_12BIT,
+                           INA219.MODE_SHUNT_CONTINUOUS)
+        self.driver.set_load(12.0, 1.0)
+        self.now += 532e-6
+        with patch('time.sleep', side_effect=lambda s: self.convert()):
+            self.assertAlmostEqual(self.ina.current(), 1000.0, 0)
+        self.assertEqual(self.ina._gain, INA219.GAIN_8_320MV)
+
+    def test_overflow_manual_gain(self):
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.driver)
+        self.ina.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV)
+        self.driver.set_load(5.0, 0.5)
+        self.convert()
+        with self.assertRaises(DeviceRangeError):
+            self.ina.current()
+
+    def test_reset(self):
+        self.ina.reset()
+        self.assertEqual(self.driver.read_word(0x40, 0x00), 0x399f)
+        self.assertEqual(self.driver.read_word(0x40, 0x05), 0)
+
+    def test_power_down(self):
+        self.ina.sleep()
+        self.convert()
+        self.assertFalse(self.ina.is_conversion_ready())
+
+    def test_asleep_gain_not_stepped_down(self):
+        self.ina.configure_auto_gain(step_down_samples=16)
+        self.driver.set_load(12.0, 1.0)
+        self.convert()
+        with patch('time.sleep', side_effect=lambda s: self.convert()):
+            self.ina.current()
+        self.assertEqual(self.ina._gain, INA219.GAIN_8_320MV)
+        self.driver.set_load(12.0, 0.01)
+        self.convert()
+        self.ina.sleep()
+        for _ in range(20):
+            self.ina.current()
+        self.assertEqual(self.ina._gain, INA219.GAIN_8_320MV)
+        self.assertEqual(self.driver.read_word(0x40, 0x00) & 0x7, 0)
+        self.ina.wake()
+        self.assertEqual(self.driver.read_word(0x40, 0x00) & 0x7, 0x7)
+
+    @patch('time.sleep')
+    def test_asleep_gain_increase_stays_powered_down(self, sleep):
+        self.driver.set_load(12.0, 1.0)
+        self.convert()
+        self.ina.sleep()
+        # the stale overflow of the last conversion still increases the gain
+        self.ina.current()
+        self.assertEqual(self.ina._gain, INA219.GAIN_8_320MV)
+        self.assertEqual(self.driver.read_word(0x40, 0x00), 0x1998)
+
+    def test_triggered(self):
+        self.ina.configure(INA219.RANGE_16V, INA219.GAIN_1_40MV,
+                           mode=INA219.MODE_TRIGGERED)
+        self.ina.trigger()
+        self.assertIsNone(self.ina.result(blocking=False))
+        self.convert()
+        self.assertAlmostEqual(self.ina.result(blocking=False).voltage, 5.0)
+        self.convert()
+        self.assertIsNone(self.ina.result(blocking=False))
+
+    def test_devices_and_transactions(self):
+        self.driver.set_load(3.3, 0.05, address=0x41)
+        other = INA219(0.1, 0.4, address=0x41, i2c_driver=self.driver)
+        other.configure(INA219.RANGE_16V)
+        self.convert()
+        self.driver.transactions = 0
+        self.assertAlmostEqual(other.read_all().voltage, 3.3, 2)
+        self.assertAlmostEqual(self.ina.read_all().voltage, 5.0)
+        self.assertEqual(self.driver.transactions, 2)
+
+    def test_no_device(self):
+        with self.assertRaises(OSError):
+            self.driver.read_word(0x42, 0x00)
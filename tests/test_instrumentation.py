@@ -0,0 +1,115 @@
+import errno
+import sys
+import logging
+import unittest
+
+from ina219 import drivers, INA219, I2cDriver
+from ina219.instrumentation import InstrumentedDriver, Metrics
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class FakeClock:
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class RegisteredDriver:
+    """Driver registered with I2cDriver.register(), without read_words()."""
+
+    def write(self, address, register, data):
+        pass
+
+    def read_word(self, address, register, signed=False):
+        return 0
+
+
+I2cDriver.register(RegisteredDriver)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = drivers.SimulatedINA219Driver()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.driver)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self.ina.metrics)
+        self.assertIs(self.ina._i2c, self.driver)
+
+    def test_enable_disable(self):
+        metrics = self.ina.enable_metrics()
+        self.assertIs(self.ina.metrics, metrics)
+        self.assertIsInstance(self.ina._i2c, InstrumentedDriver)
+        self.assertIs(self.ina.enable_metrics(metrics), metrics)
+        self.assertIs(self.ina._i2c.driver, self.driver)
+        self.ina.disable_metrics()
+        self.assertIsNone(self.ina.metrics)
+        self.assertIs(self.ina._i2c, self.driver)
+
+    def test_configure(self):
+        metrics = self.ina.enable_metrics()
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+        self.assertEqual(metrics.transactions, 2)
+        self.assertEqual(metrics.bytes, 4)
+        self.assertEqual(metrics.get('write', 0x05).transactions, 1)
+        self.assertEqual(metrics.get('write', 0x00).transactions, 1)
+
+    def test_current(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+        metrics = self.ina.enable_metrics()
+        self.ina.current()
+        self.assertEqual(metrics.transactions, 2)
+        self.assertEqual(metrics.get('read', 0x02).transactions, 1)
+        self.assertEqual(metrics.get('read', 0x04).transactions, 1)
+
+    def test_read_all_combined(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+        metrics = self.ina.enable_metrics()
+        self.ina.read_all()
+        self.assertEqual(metrics.transactions, 1)
+        burst = metrics.get('read_words', (0x02, 0x01, 0x04, 0x03))
+        self.assertEqual(burst.transactions, 1)
+        self.assertEqual(burst.bytes, 8)
+
+    def test_read_all_not_combined(self):
+        driver = RegisteredDriver()
+        metrics = Metrics()
+        instrumented = InstrumentedDriver(driver, metrics)
+        self.assertFalse(instrumented._combined)
+        self.assertEqual(instrumented.read_words(0x40, [0x02, 0x01]), [0, 0])
+        self.assertEqual(metrics.transactions, 2)
+        self.assertEqual(metrics.get('read', 0x01).transactions, 1)
+
+    def test_errors(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+        metrics = self.ina.enable_metrics()
+        self.ina._address = 0x41
+        with self.assertRaises(OSError) as context:
+            self.ina.voltage()
+        self.assertEqual(context.exception.errno, errno.EREMOTEIO)
+        self.assertEqual(metrics.errors, 1)
+        self.assertEqual(metrics.bytes, 0)
+
+    def test_latency_histogram(self):
+        metrics = self.ina.enable_metrics(Metrics(clock=FakeClock(100e-6)))
+        for _ in range(10):
+            self.ina.reset()
+        write = metrics.get('write', 0x00)
+        self.assertEqual(write.transactions, 10)
+        self.assertAlmostEqual(write.seconds, 1e-3)
+        # 100us falls into the bucket of 64us to 128us
+        self.assertEqual(write.histogram[7], 10)
+        self.assertAlmostEqual(write.percentile(0.99), 128e-6)
+        self.assertIn('0x00', metrics.report())
+        metrics.reset()
+        self.assertEqual(metrics.transactions, 0)
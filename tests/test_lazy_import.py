@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+def imported_modules(statement):
+    """Return the ina219 modules imported by a statement in a new process."""
+    code = statement + '; import sys; ' \
+        'print(" ".join(m for m in sys.modules if m.startswith("ina219")))'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=root)
+    return set(output.decode().split())
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_package(self):
+        self.assertEqual(imported_modules('import ina219'), {'ina219'})
+
+    def test_convert(self):
+        self.assertEqual(imported_modules('import ina219.convert'),
+                         {'ina219', 'ina219.convert'})
+
+    def test_names(self):
+        self.assertEqual(imported_modules('from ina219 import INA219'),
+                         {'ina219', 'ina219.ina219'})
+        self.assertIn('ina219.stats',
+                      imported_modules('import ina219; ina219.stats'))
@@ -1,10 +1,11 @@
 import sys
 import logging
+import tracemalloc
 import unittest
 
 from mock import Mock
 
-from ina219 import INA219, I2cDriver, DeviceRangeError
+from ina219 import INA219, I2cDriver, DeviceRangeError, MeasurementRecord
 
 
 logger = logging.getLogger()
@@ -113,3 +114,205 @@ class TestRead(unittest.TestCase):
         self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_2_80MV)
         self.i2c.read_word = Mock(return_value=0x8)
         self.assertFalse(self.ina.is_conversion_ready())
+
+    def test_read_all(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        registers = {0x01: 0x7d0, 0x02: 0x2592, 0x03: 0x1ea9, 0x04: 0x1}
+        self.i2c.read_words = Mock(
+            side_effect=lambda address, regs: [registers[r] for r in regs])
+        measurement = self.ina.read_all()
+        self.assertEqual(measurement.voltage, 4.808)
+        self.assertEqual(measurement.shunt_voltage, 20.0)
+        self.assertAlmostEqual(measurement.current, 0.012, 3)
+        self.assertAlmostEqual(measurement.power, 1914.0, 0)
+        self.assertAlmostEqual(measurement.supply_voltage, 4.828)
+        self.assertTrue(measurement.ready)
+        self.i2c.read_words.assert_called_once_with(
+            0x40, (0x02, 0x01, 0x04, 0x03))
+        self.i2c.read_word.assert_not_called()
+
+    def test_read_all_not_ready(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        self.i2c.read_words = Mock(return_value=[0x2590, 0x7d0, 0x1, 0x1ea9])
+        measurement = self.ina.read_all()
+        self.assertFalse(measurement.ready)
+        self.assertEqual(measurement.voltage, 4.808)
+
+    def test_read_all_negative(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        self.i2c.read_words = Mock(return_value=[0xfa0, 0xf060, 0xb2ae, 0])
+        measurement = self.ina.read_all()
+        self.assertEqual(measurement.shunt_voltage, -40.0)
+        self.assertAlmostEqual(measurement.current, -241.4, 1)
+
+    def test_read_into(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        self.i2c.read_words = Mock(return_value=[0x2592, 0x7d0, 0x1, 0x1ea9])
+        record = MeasurementRecord()
+        self.assertIs(self.ina.read_into(record), record)
+        self.assertEqual(record.voltage, 4.808)
+        self.assertEqual(record.shunt_voltage, 20.0)
+        self.assertAlmostEqual(record.supply_voltage, 4.828)
+        self.assertTrue(record.ready)
+        self.assertEqual(record.measurement(), self.ina.read_all()._replace(
+            timestamp=record.timestamp))
+
+    def test_read_all_overflow_error(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_2_80MV)
+        self.i2c.read_words = Mock(return_value=[0xfa1, 0, 0, 0])
+        self.i2c.read_word = Mock(return_value=0xfa1)
+        with self.assertRaisesRegex(DeviceRangeError, self.GAIN_RANGE_MSG):
+            self.ina.read_all()
+        self.i2c.read_words.assert_called_once()
+
+
+class TestReadShuntOnly(unittest.TestCase):
+
+    GAIN_RANGE_MSG = r"Current out of range \(overflow\)"
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           mode=self.ina.MODE_SHUNT_CONTINUOUS)
+
+    def test_configure(self):
+        self.i2c.write.assert_called_with(0x40, 0x00, bytes([0x01, 0x9d]))
+        self.assertAlmostEqual(self.ina.conversion_time(), 532e-6)
+
+    def test_current_without_bus_voltage(self):
+        self.i2c.read_words = Mock(return_value=[0x7d0, 0xb2ae])
+        self.assertAlmostEqual(self.ina.current(), -241.4, 1)
+        self.i2c.read_words.assert_called_once_with(0x40, (0x01, 0x04))
+        self.i2c.read_word.assert_not_called()
+
+    def test_shunt_voltage_without_bus_voltage(self):
+        self.i2c.read_words = Mock(return_value=[0xf830])
+        self.assertEqual(self.ina.shunt_voltage(), -20.0)
+        self.i2c.read_words.assert_called_once_with(0x40, (0x01,))
+
+    def test_current_overflow_saturated(self):
+        self.ina = INA219(0.1, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           mode=self.ina.MODE_SHUNT_CONTINUOUS)
+        self.i2c.read_words = Mock(return_value=[4000, 0x7fff])
+        with self.assertRaisesRegex(DeviceRangeError, self.GAIN_RANGE_MSG):
+            self.ina.current()
+
+    def test_current_overflow_calculation(self):
+        # the current register overflows before the 40mV range saturates
+        self.i2c.read_words = Mock(return_value=[3997, 0x7fff])
+        with self.assertRaisesRegex(DeviceRangeError, self.GAIN_RANGE_MSG):
+            self.ina.current()
+        self.i2c.read_words = Mock(return_value=[3996, 0x7ffe])
+        self.assertAlmostEqual(self.ina.current(), 399.6, 1)
+
+    def test_bus_only_conversion_time(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           self.ina.ADC_9BIT, self.ina.ADC_128SAMP,
+                           self.ina.MODE_BUS_CONTINUOUS)
+        self.assertAlmostEqual(self.ina.conversion_time(), 84e-6)
+        self.i2c.read_word = Mock(return_value=0x2592)
+        self.assertEqual(self.ina.voltage(), 4.808)
+
+
+class ConstantDriver(I2cDriver):
+    """Driver of a device with constant registers, allocating nothing."""
+
+    REGISTERS = {0x01: 0x7d0, 0x02: 0x2592, 0x03: 0x1ea9, 0x04: 0x1}
+
+    @classmethod
+    def load(cls, interface):
+        return cls()
+
+    def write(self, address, register, data):
+        pass
+
+    def read_word(self, address, register, signed=False):
+        return self.REGISTERS[register]
+
+    def read_words_into(self, address, registers, values):
+        values[0] = self.REGISTERS[registers[0]]
+        values[1] = self.REGISTERS[registers[1]]
+        values[2] = self.REGISTERS[registers[2]]
+        values[3] = self.REGISTERS[registers[3]]
+
+
+class RegisteredDriver:
+    """Driver registered with I2cDriver.register(), with only the abstract
+    methods of I2cDriver."""
+
+    def __init__(self, registers):
+        self.registers = registers
+
+    def write(self, address, register, data):
+        pass
+
+    def read_word(self, address, register, signed=False):
+        return self.registers[register]
+
+
+I2cDriver.register(RegisteredDriver)
+
+
+class TestReadRegisteredDriver(unittest.TestCase):
+
+    def setUp(self):
+        self.i2c = RegisteredDriver(dict(ConstantDriver.REGISTERS))
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+
+    def test_read_all(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        measurement = self.ina.read_all()
+        self.assertEqual(measurement.voltage, 4.808)
+        self.assertEqual(measurement.shunt_voltage, 20.0)
+        self.assertAlmostEqual(measurement.power, 1914.0, 0)
+
+    def test_result(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           mode=self.ina.MODE_TRIGGERED)
+        self.ina.trigger()
+        self.assertEqual(self.ina.result(blocking=False).voltage, 4.808)
+
+    def test_current_without_bus_voltage(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           mode=self.ina.MODE_SHUNT_CONTINUOUS)
+        self.assertAlmostEqual(self.ina.current(), 0.012, 3)
+
+
+@unittest.skipUnless(hasattr(tracemalloc, 'reset_peak'),
+                     'requires Python 3.9')
+class TestReadAllocations(unittest.TestCase):
+
+    def setUp(self):
+        self.ina = INA219(0.1, 0.4, i2c_driver=ConstantDriver())
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+
+    def allocated(self, func):
+        """Return the median of the bytes allocated at peak per call."""
+        for _ in range(10):
+            func()
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(101):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                func()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+        return sorted(peaks)[50]
+
+    def test_read_into(self):
+        record = MeasurementRecord()
+        self.assertLess(self.allocated(lambda: self.ina.read_into(record)),
+                        self.allocated(self.ina.read_all))
+        # at most the bus voltage register value shifted as an int
+        self.assertLessEqual(
+            self.allocated(lambda: self.ina.read_into(record)), 32)
+
+    def test_read_raw(self):
+        words = [0] * 4
+        self.assertEqual(self.allocated(lambda: self.ina._read_raw(words)), 0)
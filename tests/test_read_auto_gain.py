@@ -25,8 +25,8 @@ class TestReadAutoGain(unittest.TestCase):
 
         self.ina._read_voltage_register = Mock()
         self.ina._read_voltage_register.side_effect = [0xfa1, 0xfa0]
-        self.ina._read_configuration = Mock()
-        self.ina._read_configuration.side_effect = [0x99f, 0x99f]
+        # 70mV, within the 80mV range, so the current calculation overflowed
+        self.ina._shunt_voltage_register = Mock(return_value=7000)
         self.ina._current_register = Mock(return_value=100)
 
         self.assertAlmostEqual(self.ina.current(), 4.878, 3)
@@ -42,7 +42,51 @@ class TestReadAutoGain(unittest.TestCase):
         self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
 
         self.ina._read_voltage_register = Mock(return_value=0xfa1)
-        self.ina._read_configuration = Mock(return_value=0x199f)
+        self.ina._shunt_voltage_register = Mock(return_value=4000)
 
         with self.assertRaisesRegex(DeviceRangeError, self.GAIN_RANGE_MSG):
             self.ina.current()
+        # the saturated 40mV range jumps straight to the largest range
+        self.assertEqual(self.ina._gain, self.ina.GAIN_8_320MV)
+        self.assertEqual(self.i2c.write.call_count, 4)
+
+    def test_auto_gain_jump(self):
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+        self.i2c.reset_mock()
+
+        self.ina._read_voltage_register = Mock(side_effect=[0xfa1, 0xfa0])
+        self.ina._shunt_voltage_register = Mock(return_value=-8000)
+        self.ina._current_register = Mock(return_value=100)
+
+        self.assertAlmostEqual(self.ina.current(), 9.756, 3)
+        self.i2c.write.assert_has_calls(
+            [call(0x40, 0x05, bytes([0x10, 0x66])),
+             call(0x40, 0x00, bytes([0x19, 0x9f]))])
+        self.i2c.read_word.assert_not_called()
+
+    def test_auto_gain_step_down(self):
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_AUTO)
+        self.ina.configure_auto_gain(hysteresis=0.5, step_down_samples=3)
+        self.i2c.reset_mock()
+
+        self.ina._read_voltage_register = Mock(return_value=0xfa0)
+        # 20mV, exactly half of the 40mV range, does not step down
+        self.ina._shunt_voltage_register = Mock(return_value=2000)
+        for _ in range(3):
+            self.ina.shunt_voltage()
+        self.i2c.write.assert_not_called()
+
+        self.ina._shunt_voltage_register = Mock(return_value=-1999)
+        for _ in range(3):
+            self.ina.shunt_voltage()
+        self.assertEqual(self.ina._gain, self.ina.GAIN_1_40MV)
+        self.i2c.write.assert_has_calls(
+            [call(0x40, 0x05, bytes([0x83, 0x33])),
+             call(0x40, 0x00, bytes([0x01, 0x9f]))])
+
+    def test_configure_auto_gain_invalid(self):
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        with self.assertRaisesRegex(ValueError, 'hysteresis'):
+            self.ina.configure_auto_gain(hysteresis=0)
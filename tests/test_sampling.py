@@ -0,0 +1,296 @@
+import itertools
+import sys
+import logging
+import threading
+import time
+import unittest
+
+from mock import Mock, patch
+
+from ina219 import drivers, INA219, I2cDriver
+from ina219.sampling import (BackgroundSampler, ConversionSampler,
+                             MultiBusSampler, RingBuffer)
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class FakeClock:
+    """Simulated clock, advanced only by sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += 1
+        self.now += seconds
+
+
+class FakeDevice:
+    """Device converting continuously every `period` seconds of the clock."""
+
+    def __init__(self, clock, period):
+        self.clock = clock
+        self.period = period
+        self.last_read = 0
+
+    def conversion(self):
+        return int(self.clock() / self.period)
+
+    def read_word(self, address, register, signed=False):
+        if register == 0x02:
+            cnvr = 0x2 if self.conversion() > self.last_read else 0
+            return 0x2590 | cnvr
+        if register == 0x03:
+            self.last_read = self.conversion()
+            return self.last_read
+        return 0
+
+    def read_words(self, address, registers):
+        return [self.read_word(address, r) for r in registers]
+
+
+class TestConversionSampler(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_2_80MV,
+                           self.ina.ADC_12BIT, self.ina.ADC_4SAMP)
+        self.clock = FakeClock()
+        self.device = FakeDevice(self.clock, self.ina.conversion_time())
+        self.i2c.read_word = Mock(side_effect=self.device.read_word)
+        self.i2c.read_words = Mock(side_effect=self.device.read_words)
+        self.sampler = ConversionSampler(
+            self.ina, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_conversion_time(self):
+        self.assertAlmostEqual(self.ina.conversion_time(), 2.662e-3)
+        self.assertEqual(INA219.adc_conversion_time(INA219.ADC_9BIT), 84e-6)
+
+    def test_each_conversion_returned_once(self):
+        readings = [self.sampler.read() for _ in range(100)]
+        powers = [r.power for r in readings]
+        self.assertEqual(len(set(powers)), 100)
+        self.assertEqual(sorted(powers), powers)
+        conversions = [int(p / (self.ina._power_lsb * 1000) + 0.5)
+                       for p in powers]
+        self.assertEqual(conversions, list(range(1, 101)))
+        self.assertEqual(self.sampler.missed, 0)
+
+    def test_sleeps_before_polling(self):
+        for _ in range(100):
+            self.sampler.read()
+        # one sleep for most of the conversion time and a few short polls
+        self.assertLess(self.sampler.polls / self.sampler.samples, 4)
+
+    def test_missed_conversions(self):
+        self.sampler.read()
+        self.clock.sleep(self.device.period * 3.2)
+        self.sampler.read()
+        self.assertEqual(self.sampler.missed, 2)
+        self.assertEqual(self.sampler.samples, 2)
+
+    def test_timeout(self):
+        self.sampler.read()
+        self.i2c.read_word = Mock(return_value=0x2590)  # never ready
+        start = self.clock()
+        with self.assertRaises(TimeoutError):
+            self.sampler.read()
+        self.assertAlmostEqual(self.clock() - start,
+                               self.ina.conversion_timeout(),
+                               delta=self.device.period / 10)
+
+    def test_not_converting(self):
+        # the ADC off mode has no conversion time to poll a fraction of
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_2_80MV, mode=4)
+        self.i2c.read_word = Mock(return_value=0x2590)  # never ready
+        with self.assertRaises(TimeoutError):
+            self.sampler.read()
+        self.assertAlmostEqual(
+            self.clock.slept,
+            self.ina.conversion_timeout() / self.ina.POLL_INTERVAL_MIN,
+            delta=1)
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = RingBuffer(4)
+
+    def append(self, *samples):
+        for n in samples:
+            self.buffer.append(float(n), [n, n + 1, n + 2, n + 3])
+
+    def test_drain(self):
+        self.append(1, 2)
+        self.assertEqual(len(self.buffer), 2)
+        timestamps, words = self.buffer.drain()
+        self.assertEqual(list(timestamps), [1.0, 2.0])
+        self.assertEqual(list(words), [1, 2, 3, 4, 2, 3, 4, 5])
+        self.assertEqual(len(self.buffer), 0)
+        timestamps, words = self.buffer.drain()
+        self.assertEqual(len(timestamps), 0)
+        self.assertEqual(len(words), 0)
+
+    def test_drain_wrapped(self):
+        self.append(1, 2, 3)
+        self.buffer.drain()
+        self.append(4, 5, 6)
+        timestamps, words = self.buffer.drain()
+        self.assertEqual(list(timestamps), [4.0, 5.0, 6.0])
+        self.assertEqual(list(words[::4]), [4, 5, 6])
+        self.assertEqual(self.buffer.dropped, 0)
+
+    def test_dropped(self):
+        self.append(1, 2, 3, 4, 5, 6)
+        timestamps, words = self.buffer.drain()
+        # the oldest slot may be being overwritten by the next append
+        self.assertEqual(list(timestamps), [4.0, 5.0, 6.0])
+        self.assertEqual(list(words[::4]), [4, 5, 6])
+        self.assertEqual(self.buffer.dropped, 3)
+
+    def test_slot_being_written_dropped(self):
+        self.append(1, 2, 3, 4)
+        # the producer has written the timestamp of sample 5 into the slot
+        # of sample 1, but neither its words nor published it yet
+        self.buffer.timestamps[0] = 5.0
+        timestamps, words = self.buffer.drain()
+        self.assertEqual(list(timestamps), [2.0, 3.0, 4.0])
+        self.assertEqual(list(words[::4]), [2, 3, 4])
+        self.assertEqual(self.buffer.dropped, 1)
+
+
+class TestBackgroundSampler(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_2_80MV,
+                           self.ina.ADC_9BIT, self.ina.ADC_9BIT)
+
+    def test_fixed_rate(self):
+        self.i2c.read_words = Mock(return_value=[0xfa0, 1, 2, 3])
+        with BackgroundSampler(self.ina, rate=1000) as sampler:
+            time.sleep(0.05)
+        timestamps, words = sampler.drain()
+        self.assertGreater(len(timestamps), 5)
+        self.assertEqual(list(words[:4]), [0xfa0, 1, 2, 3])
+        self.assertEqual(list(timestamps), sorted(timestamps))
+        self.assertIsNone(sampler.error)
+
+    def test_conversion_ready(self):
+        clock = FakeClock()
+        device = FakeDevice(clock, 0.0001)
+        self.i2c.read_word = Mock(side_effect=device.read_word)
+        self.i2c.read_words = Mock(side_effect=device.read_words)
+        with BackgroundSampler(self.ina, clock=clock) as sampler:
+            while len(sampler.buffer) < 10:
+                clock.sleep(0.0001)
+                time.sleep(0.001)
+        timestamps, words = sampler.drain()
+        powers = list(words[3::4])
+        self.assertEqual(powers, sorted(set(powers)))
+
+    def test_not_converting(self):
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_2_80MV, mode=4)
+        self.i2c.read_word = Mock(return_value=0x2590)  # never ready
+        with patch('ina219.sampling.time') as sampling_time:
+            with BackgroundSampler(self.ina) as sampler:
+                threading.Event().wait(0.01)
+        sampling_time.sleep.assert_called_with(self.ina.POLL_INTERVAL_MIN)
+        self.assertEqual(len(sampler.buffer), 0)
+
+
+class TestMultiBusSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.devices = []
+        for addresses in ((0x40, 0x41), (0x40,)):
+            driver = drivers.SimulatedINA219Driver(addresses=addresses)
+            for address in addresses:
+                ina = INA219(0.1, 0.4, address=address, i2c_driver=driver)
+                ina.configure(ina.RANGE_16V, ina.GAIN_AUTO,
+                              ina.ADC_9BIT, ina.ADC_9BIT)
+                self.devices.append(ina)
+
+    def assert_merged(self, samples):
+        self.assertEqual(sorted(samples), samples)
+        self.assertEqual({s.device for s in samples}, {0, 1, 2})
+        self.assertEqual(samples[0].words[0] >> 3, 1250)  # 5V
+
+    def test_thread_per_bus(self):
+        sampler = MultiBusSampler(self.devices, rate=1000)
+        self.assertEqual(sampler.buses, 2)
+
+    def test_fixed_rate(self):
+        with MultiBusSampler(self.devices, rate=1000) as sampler:
+            time.sleep(0.05)
+        self.assert_merged(sampler.drain())
+        self.assertIsNone(sampler.error)
+        self.assertEqual(sampler.dropped, 0)
+
+    def test_conversion_ready(self):
+        with MultiBusSampler(self.devices) as sampler:
+            time.sleep(0.05)
+        self.assert_merged(sampler.drain())
+        self.assertIsNone(sampler.error)
+
+    def test_fixed_rate_skipped(self):
+        # every sample takes two periods of the clock
+        ticks = itertools.count()
+        with MultiBusSampler(self.devices[2:], rate=1000,
+                             clock=lambda: next(ticks) * 0.001) as sampler:
+            time.sleep(0.02)
+        samples = len(sampler.drain())
+        self.assertGreater(samples, 10)
+        self.assertAlmostEqual(sampler.skipped[0], samples, delta=1)
+        self.assertEqual(sampler.lost, sampler.skipped[0])
+
+    def test_conversion_ready_missed(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        i2c = Mock()
+        ina = INA219(0.1, 0.4, i2c_driver=i2c)
+        ina.configure(ina.RANGE_16V, ina.GAIN_2_80MV,
+                      ina.ADC_12BIT, ina.ADC_4SAMP)
+        clock = FakeClock()
+        device = FakeDevice(clock, ina.conversion_time())
+        i2c.read_word = Mock(side_effect=device.read_word)
+        i2c.read_words = Mock(side_effect=device.read_words)
+
+        def sample_clock():
+            # three conversions complete between two polls
+            clock.sleep(device.period * 3)
+            return clock()
+
+        with MultiBusSampler([ina], clock=sample_clock) as sampler:
+            time.sleep(0.02)
+        samples = len(sampler.drain())
+        self.assertGreater(samples, 10)
+        self.assertAlmostEqual(sampler.missed[0], 2 * (samples - 1),
+                               delta=2)
+        self.assertEqual(sampler.skipped, [0])
+
+    def test_not_converting(self):
+        for ina in self.devices:
+            ina.sleep()
+        with patch('ina219.sampling.time') as sampling_time:
+            with MultiBusSampler(self.devices) as sampler:
+                threading.Event().wait(0.01)
+        sampling_time.sleep.assert_called_with(INA219.POLL_INTERVAL_MIN)
+        self.assertIsNone(sampler.error)
+
+    def test_error(self):
+        self.devices[2]._address = 0x41
+        with patch('threading.excepthook'):
+            with MultiBusSampler(self.devices, rate=1000) as sampler:
+                time.sleep(0.05)
+        self.assertIsInstance(sampler.error, OSError)
@@ -0,0 +1,74 @@
+import sys
+import logging
+import unittest
+
+from mock import Mock, call
+
+from ina219 import INA219, I2cDriver
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestShadowRegisters(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c,
+                          shadow_registers=True)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        self.i2c.reset_mock()
+
+    def test_sleep_without_read(self):
+        self.ina.sleep()
+        self.i2c.read_word.assert_not_called()
+        self.i2c.write.assert_called_once_with(
+            0x40, 0x00, bytes([0x01, 0x98]))
+
+    def test_wake_without_read(self):
+        self.ina.sleep()
+        self.ina.wake()
+        self.i2c.read_word.assert_not_called()
+        self.i2c.write.assert_called_with(0x40, 0x00, bytes([0x01, 0x9f]))
+
+    def test_increase_gain_without_read(self):
+        self.ina._auto_gain_enabled = True
+        # bus voltage with overflow, shunt voltage of 38.4mV, bus voltage
+        self.i2c.read_word = Mock(side_effect=[0xfa1, 0xf00, 0xfa0])
+        self.ina._handle_current_overflow()
+        self.assertEqual(self.i2c.read_word.call_count, 3)
+        self.i2c.write.assert_called_with(0x40, 0x00, bytes([0x09, 0x9f]))
+
+    def test_reset(self):
+        self.ina.reset()
+        self.assertEqual(self.ina._read_configuration(), 0x399f)
+        self.i2c.read_word.assert_not_called()
+
+    def test_resync(self):
+        self.i2c.read_word = Mock(side_effect=[0x1234, 0x8332])
+        self.ina.resync()
+        self.assertEqual(self.ina._read_configuration(), 0x1234)
+        self.i2c.read_word.assert_has_calls(
+            [call(0x40, 0x00, False), call(0x40, 0x05, False)])
+
+
+class TestVerifyWrites(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c, verify_writes=True)
+
+    def test_verified(self):
+        self.i2c.read_word = Mock(side_effect=[0x8332, 0x019f])
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
+        self.i2c.read_word.assert_has_calls(
+            [call(0x40, 0x05, False), call(0x40, 0x00, False)])
+
+    def test_verification_failed(self):
+        self.i2c.read_word = Mock(return_value=0)
+        with self.assertRaisesRegex(IOError, "register 0x05 failed"):
+            self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV)
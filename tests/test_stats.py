@@ -0,0 +1,135 @@
+import sys
+import logging
+import math
+import unittest
+
+from mock import Mock, patch
+
+from ina219 import INA219, I2cDriver, Measurement
+from ina219.convert import Converted
+from ina219.stats import MeasurementStatistics, RunningStatistics
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestRunningStatistics(unittest.TestCase):
+
+    VALUES = [2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0]
+
+    def assert_statistics(self, stats):
+        self.assertEqual(stats.count, 8)
+        self.assertEqual(stats.minimum, 2.0)
+        self.assertEqual(stats.maximum, 9.0)
+        self.assertAlmostEqual(stats.mean, 5.0)
+        self.assertAlmostEqual(stats.variance, 4.0)
+        self.assertAlmostEqual(stats.stdev, 2.0)
+        self.assertAlmostEqual(stats.rms, math.sqrt(29.0))
+
+    def test_empty(self):
+        stats = RunningStatistics()
+        self.assertEqual(stats.count, 0)
+        self.assertTrue(math.isnan(stats.mean))
+        self.assertTrue(math.isnan(stats.minimum))
+        self.assertTrue(math.isnan(stats.rms))
+
+    def test_add(self):
+        stats = RunningStatistics()
+        for value in self.VALUES:
+            stats.add(value)
+        self.assert_statistics(stats)
+
+    def test_extend_blocks(self):
+        stats = RunningStatistics()
+        stats.add(self.VALUES[0])
+        stats.extend(self.VALUES[1:5])
+        stats.extend([])
+        stats.extend(self.VALUES[5:])
+        self.assert_statistics(stats)
+
+    @patch('ina219.convert._numpy', Mock(return_value=None))
+    def test_extend_without_numpy(self):
+        stats = RunningStatistics()
+        stats.extend(self.VALUES)
+        self.assert_statistics(stats)
+
+
+class TestMeasurementStatistics(unittest.TestCase):
+
+    # constant 5V, current ramping from 0mA to 300mA over 3 seconds
+    TIMESTAMPS = [10.0, 11.0, 12.0, 13.0]
+    CURRENT = [0.0, 100.0, 200.0, 300.0]
+
+    def measurements(self):
+        for timestamp, current in zip(self.TIMESTAMPS, self.CURRENT):
+            yield Measurement(timestamp, 5.0, current / 10, current,
+                              current * 5)
+
+    def converted(self, overflow=(0, 0, 0, 0)):
+        return Converted([5.0] * 4, [c / 10 for c in self.CURRENT],
+                         self.CURRENT, [c * 5 for c in self.CURRENT],
+                         list(overflow))
+
+    def assert_energy(self, stats):
+        # 450mAs and 2250mWs
+        self.assertAlmostEqual(stats.charge_mah, 0.125)
+        self.assertAlmostEqual(stats.energy_wh, 0.000625)
+        self.assertAlmostEqual(stats.average_power, 750.0)
+        self.assertEqual(stats.duration, 3.0)
+        self.assertAlmostEqual(stats.current.mean, 150.0)
+        self.assertEqual(stats.power.maximum, 1500.0)
+        self.assertEqual(stats.voltage.variance, 0.0)
+
+    def test_empty(self):
+        stats = MeasurementStatistics()
+        self.assertEqual(stats.energy_wh, 0.0)
+        self.assertEqual(stats.duration, 0.0)
+        self.assertTrue(math.isnan(stats.average_power))
+
+    def test_measurements(self):
+        stats = MeasurementStatistics()
+        stats.extend(self.measurements())
+        self.assert_energy(stats)
+
+    def test_columns(self):
+        stats = MeasurementStatistics()
+        stats.add_columns(self.TIMESTAMPS, self.converted())
+        self.assert_energy(stats)
+
+    def test_columns_in_blocks(self):
+        stats = MeasurementStatistics()
+        measurements = list(self.measurements())
+        stats.add(measurements[0])
+        converted = self.converted()
+        stats.add_columns(self.TIMESTAMPS[1:3],
+                          Converted(*(c[1:3] for c in converted)))
+        stats.add_columns(self.TIMESTAMPS[3:],
+                          Converted(*(c[3:] for c in converted)))
+        self.assert_energy(stats)
+
+    @patch('ina219.convert._numpy', Mock(return_value=None))
+    def test_columns_without_numpy(self):
+        stats = MeasurementStatistics()
+        stats.add_columns(self.TIMESTAMPS, self.converted())
+        self.assert_energy(stats)
+
+    def test_columns_overflow(self):
+        stats = MeasurementStatistics()
+        stats.add_columns(self.TIMESTAMPS, self.converted((0, 0, 1, 0)))
+        self.assertEqual(stats.overflows, 1)
+        self.assertEqual(stats.current.count, 3)
+        self.assertEqual(stats.voltage.count, 4)
+        # integrated over the overflow from 100mA to 300mA
+        self.assertAlmostEqual(stats.charge_mah, 0.125)
+
+    def test_words(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        ina = INA219(0.1, 0.4, i2c_driver=Mock())
+        ina.configure(ina.RANGE_16V, ina.GAIN_1_40MV)
+        stats = MeasurementStatistics()
+        words = [0x2592, 0x07d0, 0x0001, 0x1ea9] * 2
+        stats.add_words([0.0, 3600.0], words, ina.current_lsb, ina.power_lsb)
+        self.assertEqual(stats.voltage.mean, 4.808)
+        self.assertAlmostEqual(stats.energy_wh, 1.914, 3)
@@ -0,0 +1,92 @@
+import sys
+import logging
+import unittest
+
+from mock import Mock, call, patch
+
+from ina219 import INA219, I2cDriver
+
+
+logger = logging.getLogger()
+logger.level = logging.ERROR
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class TestTriggered(unittest.TestCase):
+
+    def setUp(self):
+        I2cDriver.register(Mock)  # make "Mock" a subclass of "I2cDriver"
+        self.i2c = Mock()
+        self.ina = INA219(0.1, 0.4, i2c_driver=self.i2c)
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                           mode=self.ina.MODE_TRIGGERED)
+
+    def test_configure_triggered(self):
+        calls = [call(0x40, 0x05, bytes([0x83, 0x33])),
+                 call(0x40, 0x00, bytes([0x01, 0x9b]))]
+        self.i2c.write.assert_has_calls(calls)
+
+    def test_trigger_single_write(self):
+        self.i2c.reset_mock()
+        self.ina.trigger()
+        self.i2c.write.assert_called_once_with(
+            0x40, 0x00, bytes([0x01, 0x9b]))
+        self.i2c.read_word.assert_not_called()
+
+    def test_trigger_not_triggered_mode(self):
+        for mode in (self.ina.MODE_CONTINUOUS, self.ina.MODE_BUS_CONTINUOUS):
+            with self.subTest(mode=mode):
+                self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV,
+                                   mode=mode)
+                self.i2c.reset_mock()
+                with self.assertRaisesRegex(ValueError, 'not triggered'):
+                    self.ina.trigger()
+                self.i2c.write.assert_not_called()
+
+    def test_result_not_ready(self):
+        self.i2c.read_word = Mock(return_value=0xfa0)
+        self.ina.trigger()
+        self.assertIsNone(self.ina.result(blocking=False))
+        self.assertEqual(self.i2c.read_word.call_count, 1)
+
+    def test_result_ready(self):
+        self.i2c.read_word = Mock(return_value=0xfa2)
+        self.i2c.read_words = Mock(return_value=[1, 2, 3])
+        self.ina.trigger()
+        measurement = self.ina.result(blocking=False)
+        self.assertEqual(measurement.voltage, 2.0)
+        self.assertEqual(measurement.shunt_voltage, 0.01)
+        self.assertEqual(self.i2c.read_word.call_count, 1)
+        self.i2c.read_words.assert_called_once_with(0x40, (0x01, 0x04, 0x03))
+
+    @patch('time.sleep')
+    def test_result_blocking(self, sleep):
+        self.i2c.read_word = Mock(side_effect=[0xfa0, 0xfa0, 0xfa2])
+        self.i2c.read_words = Mock(return_value=[1, 2, 3])
+        self.ina.trigger()
+        measurement = self.ina.result()
+        self.assertEqual(measurement.voltage, 2.0)
+        self.assertEqual(sleep.call_count, 3)
+
+    @patch('time.sleep')
+    def test_result_timeout(self, sleep):
+        self.i2c.read_word = Mock(return_value=0xfa0)
+        with self.assertRaisesRegex(TimeoutError, '0x40'):
+            self.ina.result(timeout=0)
+        self.assertEqual(self.ina.conversion_timeout(),
+                         self.ina.CONVERSION_TIMEOUT_MIN)
+
+    @patch('time.sleep')
+    def test_result_not_converting(self, sleep):
+        # the ADC off mode has no conversion time to poll a fraction of
+        self.ina.configure(self.ina.RANGE_16V, self.ina.GAIN_1_40MV, mode=4)
+        self.assertEqual(self.ina.conversion_time(), 0)
+        self.i2c.read_word = Mock(return_value=0xfa0)
+        with self.assertRaises(TimeoutError):
+            self.ina.result(timeout=0.001)
+        sleep.assert_called_with(self.ina.POLL_INTERVAL_MIN)
+
+    def test_wake_restores_triggered_mode(self):
+        self.i2c.read_word = Mock(return_value=0x198)
+        self.ina.wake()
+        self.i2c.write.assert_called_with(0x40, 0x00, bytes([0x01, 0x9b]))